@@ -1,70 +1,203 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import numpy as np
-from typing import List, Dict, Set, Tuple, Optional
+from typing import Iterable, Iterator, List, Dict, Set, Tuple, Optional
+import os
 import random
+import time
+from bitboard import BitBoard, as_bitboard
+from csp_model import CSPModel
+from instrumentation import DISABLED, AnalysisResult, Instrumentation, Tracer
+from arc_consistency import ArcConsistency
+from k_consistency import KConsistency
+from local_search import MinConflicts
+from propagation import LinePropagator
+from ordering import least_constraining_values, make_variable_order
+from mcts import MCTS, MCTSResult
+from search import WIN_SCORE, NegamaxSearch, SearchResult
+from threats import ThreatDetector, Threats
+from transposition import TranspositionTable
+from tablebase import DEFAULT_DIR, LOSS, UNKNOWN, WIN, Tablebase, side_to_move
+
+# متدهایی که analyze_many می‌تواند روی هر صفحه اجرا کند
+CSP_METHODS = ('backtracking_search', 'degree_heuristic', 'forward_checking', 'constraint_propagation',
+               'arc_consistency', 'k_consistency', 'min_conflicts')
+SEARCH_METHODS = ('suggest_move', 'search')
+# متدهایی که analyze می‌تواند با آمار کامل اجرا کند
+INSTRUMENTED_METHODS = CSP_METHODS + SEARCH_METHODS + ('mcts_search', 'create_game_tree')
 
 class GameAnalyzer:
-    def __init__(self):
-        self.graph = nx.DiGraph()
+    def __init__(self, tablebase_dir: Optional[str] = DEFAULT_DIR, vectorized: bool = False):
+        self._graph = None     # گراف درخت بازی؛ networkx فقط با اولین استفاده بارگذاری می‌شود
+        self._tree_view = None  # نمای درخت بازی؛ پنجره آن بین نمایش‌ها دوباره استفاده می‌شود
+        self._tree_stale = False  # گراف پس از آخرین نمایش دوباره ساخته شده است
         self.constraints = {}  # محدودیت‌های بازی
         self.domains = {}      # دامنه‌های ممکن برای هر خانه
+        self.model = None      # مدل CSP پایدار که با هر حرکت به‌روز می‌شود
+        self._models = {}      # یک مدل برای هر ابعاد (ساختار خطوط بین صفحه‌های هم‌اندازه مشترک است)
+        self.arc_stats = None  # آمار آخرین اجرای سازگاری قوس
+        self.propagation_stats = None  # آمار آخرین انتشار محدودیت (مستقل یا درون پس‌گرد)
+        self.k_stats = None  # آمار آخرین اجرای k-سازگاری
+        self.min_conflicts_stats = None  # آمار آخرین اجرای کمترین تعارض
+        self.search_nodes = 0  # تعداد گره‌های آخرین جستجوی پس‌گرد یا بررسی رو به جلو
+        self.search_backtracks = 0  # تعداد بازگشت‌ها در همان جستجو
+        self.instrumentation: Optional[Instrumentation] = None  # None = ابزارسنجی خاموش
+        self.tt = TranspositionTable()  # بین حرکت‌های یک بازی حفظ می‌شود
+        # vectorized: برگ‌های جستجو به صورت دسته‌ای با NumPy ارزیابی می‌شوند (numpy فقط در این حالت)
+        batch_evaluate = None
+        if vectorized:
+            import evaluator
+            batch_evaluate = evaluator.evaluate_children
+        self.engine = NegamaxSearch(self._evaluate_position, self.tt, batch_evaluate)
+        self.last_search = None
+        self.mcts = MCTS()  # درخت بین حرکت‌های یک بازی دوباره استفاده می‌شود
+        self.pool = None    # SearchPool ماندگار جستجوی موازی (با new_game(workers=...) ساخته می‌شود)
+        self.tablebase_dir = tablebase_dir  # None = بدون جدول پایانی
+        self._tablebases = {}
         
+    @property
+    def graph(self):
+        if self._graph is None:
+            import networkx as nx
+            self._graph = nx.DiGraph()
+        return self._graph
+
+    def new_game(self, size: Optional[int] = None, workers: int = 1):
+        """پاک کردن حافظه جستجو و ساخت مدل CSP خالی در شروع بازی جدید
+
+        workers != 1 فرایندهای Lazy-SMP و جدول مشترکشان را برای کل بازی آماده می‌کند
+        """
+        self.tt.clear()
+        self.mcts.clear()
+        if workers == 1:
+            self.close()
+        else:
+            from parallel import SearchPool, default_workers
+            workers = workers or default_workers()
+            if self.pool is not None and self.pool.workers == workers:
+                self.pool.clear()
+            else:
+                self.close()
+                self.pool = SearchPool(workers)
+        if size is not None:
+            self._use_model(CSPModel(size))
+
+    def close(self):
+        """بستن فرایندهای جستجوی موازی"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def set_cell(self, row: int, col: int, symbol: str):
+        """به‌روزرسانی افزایشی مدل CSP پس از یک حرکت (symbol='' برای پاک کردن)"""
+        if self.model is not None:
+            self.model.assign((row, col), symbol)
+
+    def _use_model(self, model: CSPModel):
+        self._models[model.size] = model
+        self.model = model
+        self.domains = model.domains
+        self.constraints = model.constraints
+
+    def _prepare(self, board, size: int):
+        """آماده کردن مدل CSP برای صفحه؛ فقط خانه‌های تغییرکرده به‌روز می‌شوند"""
+        with self._phase('prepare'):
+            if self.model is None or self.model.size != size:
+                self._use_model(self._models.get(size) or CSPModel(size))
+            self.model.restore()
+            self.model.sync(board)
+
+    def _tablebase(self, size: int) -> Optional[Tablebase]:
+        """جدول پایانی این ابعاد (یک بار با mmap باز می‌شود) یا None"""
+        if size not in self._tablebases:
+            path = os.path.join(self.tablebase_dir, f'tb_{size}.bin') if self.tablebase_dir else None
+            self._tablebases[size] = Tablebase(path) if path and os.path.exists(path) else None
+        return self._tablebases[size]
+
+    def _book_probe(self, board, size: int, player: Optional[str] = None):
+        """(حرکت، نتیجه، فاصله) از جدول پایانی، یا None اگر وضعیت در جدول نیست"""
+        tablebase = self._tablebase(size)
+        if tablebase is None:
+            return None
+        return tablebase.best_move(board, player)
+
+    def _book_move(self, board, size: int, player: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """حرکت جدول پایانی پیش از هر جستجو"""
+        with self._phase('book'):
+            hit = self._book_probe(board, size, player)
+        return hit[0] if hit else None
+
     def initialize_csp(self, board: List[List[str]], size: int):
-        """مقداردهی اولیه CSP برای بازی"""
-        self.constraints = {}
-        self.domains = {}
-        
-        # تعریف دامنه‌ها برای هر خانه
-        for i in range(size):
-            for j in range(size):
-                if board[i][j] == '':
-                    self.domains[(i, j)] = {'X', 'O'}
-                else:
-                    self.domains[(i, j)] = {board[i][j]}
-        
-        # تعریف محدودیت‌ها
-        # محدودیت ردیف‌ها
-        for i in range(size):
-            row = [(i, j) for j in range(size)]
-            self.constraints[f'row_{i}'] = row
-            
-        # محدودیت ستون‌ها
-        for j in range(size):
-            col = [(i, j) for i in range(size)]
-            self.constraints[f'col_{j}'] = col
-            
-        # محدودیت قطر اصلی
-        diag1 = [(i, i) for i in range(size)]
-        self.constraints['diag1'] = diag1
-        
-        # محدودیت قطر فرعی
-        diag2 = [(i, size-1-i) for i in range(size)]
-        self.constraints['diag2'] = diag2
+        """مقداردهی اولیه CSP برای بازی (بازسازی کامل مدل)"""
+        self._use_model(CSPModel(size))
+        self.model.sync(board)
+
+    def backtracking_search(self, board: List[List[str]], size: int, variable_order: str = 'static',
+                            value_order: str = 'default', propagate: bool = False) -> Optional[Tuple[int, int]]:
+        """الگوریتم جستجوی پس‌گرد (variable_order: static/mrv/domwdeg، value_order: default/lcv)
 
-    def backtracking_search(self, board: List[List[str]], size: int) -> Optional[Tuple[int, int]]:
-        """الگوریتم جستجوی پس‌گرد"""
-        self.initialize_csp(board, size)
+        propagate=True پس از هر تخصیص انتشار خطوط را فقط روی خطوط گذرنده از همان خانه اجرا می‌کند
+        """
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
         assignment = {}
+        order = self._variable_order(variable_order, board, size)
+        # خانه‌های تخصیص‌نیافته به صورت ماسک بیتی و شمارنده؛ بررسی پایان O(1) است
+        unassigned = self.model.board.empty
+        remaining = unassigned.bit_count()
+        self.search_nodes = 0
+        self.search_backtracks = 0
+        tracer = self.instrumentation.trace if self.instrumentation and self.instrumentation.tracer else None
+        # فقط تخصیص‌های جستجو قطعی‌اند؛ حذف‌ها همان نتیجه بررسی همسایه‌ها را زودتر می‌گیرند
+        propagator = LinePropagator(self.model, include_board=False) if propagate else None
         
         def backtrack(assignment: Dict) -> Optional[Dict]:
-            if len(assignment) == sum(1 for i in range(size) for j in range(size) if board[i][j] == ''):
+            nonlocal unassigned, remaining
+            self.search_nodes += 1
+            if tracer is not None and not self.search_nodes & 1023:
+                tracer('progress', nodes=self.search_nodes, depth=len(assignment))
+            if remaining == 0:
                 return assignment
                 
-            var = self.select_unassigned_variable(board, size, assignment)
-            if var is None:
-                return None
+            if order:
+                var = order.select(assignment)
+            else:
+                # اولین خانه تخصیص‌نیافته به ترتیب ردیفی = کم‌ارزش‌ترین بیت
+                var = divmod((unassigned & -unassigned).bit_length() - 1, size)
+            bit = 1 << (var[0] * size + var[1])
                 
-            for value in self.order_domain_values(var):
-                if self.is_consistent(var, value, assignment):
+            for value in self._domain_values(var, assignment, value_order):
+                conflict = self._conflicting_neighbor(var, value, assignment)
+                if conflict is None:
                     assignment[var] = value
-                    result = backtrack(assignment)
+                    unassigned &= ~bit
+                    remaining -= 1
+                    if propagator is None:
+                        result = backtrack(assignment)
+                    else:
+                        mark = self.model.mark()
+                        propagator.assign(var, value)
+                        result = backtrack(assignment) if propagator.propagate(assignment) else None
+                        if result is None:
+                            propagator.unassign(var, value)
+                            self.model.undo(mark)
                     if result is not None:
                         return result
                     del assignment[var]
+                    unassigned |= bit
+                    remaining += 1
+                    self.search_backtracks += 1
+                    if order:
+                        order.unassigned(var)
+                elif order:
+                    order.conflict(var, conflict)
             return None
             
-        result = backtrack(assignment)
+        try:
+            result = backtrack(assignment)
+        finally:
+            self.model.listener = None
+        if propagator is not None:
+            self.propagation_stats = propagator.stats
         if result:
             # برگرداندن اولین خانه خالی که مقداردهی شده
             for i in range(size):
@@ -75,65 +208,94 @@ class GameAnalyzer:
 
     def degree_heuristic(self, board: List[List[str]], size: int) -> Optional[Tuple[int, int]]:
         """الگوریتم هیوریستیک درجه"""
-        self.initialize_csp(board, size)
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
         
-        # محاسبه درجه هر متغیر (تعداد محدودیت‌های مرتبط)
+        # محاسبه درجه هر متغیر (تعداد خانه‌های خالی محدودیت‌های مرتبط)
         degrees = {}
         for i in range(size):
             for j in range(size):
                 if board[i][j] == '':
-                    degree = 0
-                    # بررسی محدودیت‌های مرتبط
-                    for constraint in self.constraints.values():
-                        if (i, j) in constraint:
-                            degree += len([x for x in constraint if board[x[0]][x[1]] == ''])
-                    degrees[(i, j)] = degree
+                    degrees[(i, j)] = sum(self.model.counts[name]['']
+                                          for name in self.model.cell_constraints[(i, j)])
         
         # انتخاب متغیر با بیشترین درجه
         if degrees:
             return max(degrees.items(), key=lambda x: x[1])[0]
         return None
 
-    def forward_checking(self, board: List[List[str]], size: int) -> Optional[Tuple[int, int]]:
-        """الگوریتم بررسی رو به جلو"""
-        self.initialize_csp(board, size)
+    def forward_checking(self, board: List[List[str]], size: int,
+                         variable_order: str = 'static', value_order: str = 'default') -> Optional[Tuple[int, int]]:
+        """الگوریتم بررسی رو به جلو (variable_order: static/mrv/domwdeg، value_order: default/lcv)"""
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
         assignment = {}
+        order = self._variable_order(variable_order, board, size)
+        # خانه‌های تخصیص‌نیافته به صورت ماسک بیتی و شمارنده؛ بررسی پایان O(1) است
+        unassigned = self.model.board.empty
+        remaining = unassigned.bit_count()
+        self.search_nodes = 0
+        self.search_backtracks = 0
+        tracer = self.instrumentation.trace if self.instrumentation and self.instrumentation.tracer else None
         
         def forward_check(var: Tuple[int, int], value: str) -> bool:
-            # به‌روزرسانی دامنه‌های متغیرهای مرتبط
-            for constraint in self.constraints.values():
-                if var in constraint:
-                    for neighbor in constraint:
-                        if neighbor != var and board[neighbor[0]][neighbor[1]] == '':
-                            if value in self.domains[neighbor]:
-                                self.domains[neighbor].remove(value)
-                                if not self.domains[neighbor]:
-                                    return False
+            # به‌روزرسانی دامنه‌های متغیرهای مرتبط (از جدول همسایه‌ها)
+            for neighbor in self.model.neighbors[var]:
+                if self.model.value(neighbor) == '':
+                    if self.model.prune(neighbor, value):
+                        if order:
+                            order.conflict(var, neighbor)
+                        return False
             return True
             
         def backtrack(assignment: Dict) -> Optional[Dict]:
-            if len(assignment) == sum(1 for i in range(size) for j in range(size) if board[i][j] == ''):
+            nonlocal unassigned, remaining
+            self.search_nodes += 1
+            if tracer is not None and not self.search_nodes & 1023:
+                tracer('progress', nodes=self.search_nodes, depth=len(assignment))
+            if remaining == 0:
                 return assignment
                 
-            var = self.select_unassigned_variable(board, size, assignment)
-            if var is None:
-                return None
+            if order:
+                var = order.select(assignment)
+            else:
+                # اولین خانه تخصیص‌نیافته به ترتیب ردیفی = کم‌ارزش‌ترین بیت
+                var = divmod((unassigned & -unassigned).bit_length() - 1, size)
+            bit = 1 << (var[0] * size + var[1])
                 
-            for value in self.order_domain_values(var):
-                if self.is_consistent(var, value, assignment):
+            for value in self._domain_values(var, assignment, value_order):
+                conflict = self._conflicting_neighbor(var, value, assignment)
+                if conflict is None:
                     assignment[var] = value
-                    domains_copy = {k: v.copy() for k, v in self.domains.items()}
+                    unassigned &= ~bit
+                    remaining -= 1
+                    # فقط حذف‌های همین گره در trail ثبت و هنگام بازگشت برگردانده می‌شوند
+                    mark = self.model.mark()
                     
                     if forward_check(var, value):
                         result = backtrack(assignment)
                         if result is not None:
                             return result
                             
-                    self.domains = domains_copy
+                    self.model.undo(mark)
                     del assignment[var]
+                    unassigned |= bit
+                    remaining += 1
+                    self.search_backtracks += 1
+                    if order:
+                        order.unassigned(var)
+                elif order:
+                    order.conflict(var, conflict)
             return None
             
-        result = backtrack(assignment)
+        try:
+            result = backtrack(assignment)
+        finally:
+            self.model.listener = None
         if result:
             for i in range(size):
                 for j in range(size):
@@ -142,25 +304,17 @@ class GameAnalyzer:
         return None
 
     def constraint_propagation(self, board: List[List[str]], size: int) -> Optional[Tuple[int, int]]:
-        """الگوریتم انتشار محدودیت"""
-        self.initialize_csp(board, size)
+        """الگوریتم انتشار محدودیت (آمار در self.propagation_stats)"""
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
         
-        def propagate_constraints():
-            changed = True
-            while changed:
-                changed = False
-                for constraint in self.constraints.values():
-                    # بررسی محدودیت‌های ردیف، ستون و قطر
-                    values = [board[i][j] for i, j in constraint if board[i][j] != '']
-                    if len(set(values)) == 1 and values[0] != '':
-                        # اگر همه مقادیر یکسان هستند، خانه‌های خالی را محدود کن
-                        for i, j in constraint:
-                            if board[i][j] == '':
-                                if values[0] in self.domains[(i, j)]:
-                                    self.domains[(i, j)].remove(values[0])
-                                    changed = True
-                                    
-        propagate_constraints()
+        # فهرست کار خطوط: در ابتدا همه خطوط کثیف‌اند و فقط خطوط خانه‌های تازه قطعی دوباره بررسی می‌شوند
+        propagator = LinePropagator(self.model)
+        propagator.mark_all()
+        propagator.propagate(stop_on_wipeout=False)
+        self.propagation_stats = propagator.stats
         
         # انتخاب خانه با کمترین دامنه
         min_domain = float('inf')
@@ -173,43 +327,17 @@ class GameAnalyzer:
                     
         return selected_move
 
-    def arc_consistency(self, board: List[List[str]], size: int) -> Optional[Tuple[int, int]]:
-        """الگوریتم سازگاری قوس"""
-        self.initialize_csp(board, size)
-        
-        def revise(x: Tuple[int, int], y: Tuple[int, int]) -> bool:
-            revised = False
-            for value_x in list(self.domains[x]):
-                has_support = False
-                for value_y in self.domains[y]:
-                    if value_x != value_y:
-                        has_support = True
-                        break
-                if not has_support:
-                    self.domains[x].remove(value_x)
-                    revised = True
-            return revised
-            
-        queue = []
-        # اضافه کردن تمام قوس‌ها به صف
-        for constraint in self.constraints.values():
-            for i in range(len(constraint)):
-                for j in range(i+1, len(constraint)):
-                    if board[constraint[i][0]][constraint[i][1]] == '' and \
-                       board[constraint[j][0]][constraint[j][1]] == '':
-                        queue.append((constraint[i], constraint[j]))
-                        queue.append((constraint[j], constraint[i]))
+    def arc_consistency(self, board: List[List[str]], size: int, algorithm: str = 'ac3') -> Optional[Tuple[int, int]]:
+        """الگوریتم سازگاری قوس (algorithm: 'ac3' یا 'ac2001'؛ آمار در self.arc_stats)"""
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
         
-        while queue:
-            x, y = queue.pop(0)
-            if revise(x, y):
-                if not self.domains[x]:
-                    return None
-                for constraint in self.constraints.values():
-                    if x in constraint:
-                        for z in constraint:
-                            if z != x and z != y and board[z[0]][z[1]] == '':
-                                queue.append((z, x))
+        # حذف‌ها از طریق model.prune در همان trail ثبت می‌شوند؛ فراخواننده می‌تواند با mark/undo برگرداند
+        consistent, self.arc_stats = ArcConsistency(self.model, algorithm).run()
+        if not consistent:
+            return None
         
         # انتخاب خانه با کمترین دامنه
         min_domain = float('inf')
@@ -222,39 +350,23 @@ class GameAnalyzer:
                     
         return selected_move
 
-    def k_consistency(self, board: List[List[str]], size: int, k: int = 2) -> Optional[Tuple[int, int]]:
-        """الگوریتم k-سازگاری"""
-        self.initialize_csp(board, size)
-        
-        def check_k_consistency(variables: List[Tuple[int, int]], k: int) -> bool:
-            if len(variables) < k:
-                return True
-                
-            from itertools import combinations
-            for subset in combinations(variables, k):
-                if not self._is_subset_consistent(list(subset)):
-                    return False
-            return True
-            
-        def _is_subset_consistent(subset: List[Tuple[int, int]]) -> bool:
-            # بررسی اینکه آیا این زیرمجموعه در یک محدودیت قرار دارد
-            for constraint in self.constraints.values():
-                if all(var in constraint for var in subset):
-                    # بررسی مقادیر فعلی
-                    values = [board[i][j] for i, j in subset if board[i][j] != '']
-                    if len(values) > 1 and len(set(values)) == 1:
-                        return False
-            return True
-            
-        # بررسی k-سازگاری برای تمام زیرمجموعه‌های k تایی
+    def k_consistency(self, board: List[List[str]], size: int, k: int = 2,
+                      max_checks: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """الگوریتم k-سازگاری (فقط زیرمجموعه‌های هم‌خط؛ آمار در self.k_stats)"""
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
+
+        # بررسی k-سازگاری برای زیرمجموعه‌های k تایی هر خط
         variables = [(i, j) for i in range(size) for j in range(size) if board[i][j] == '']
         
         # اگر هیچ خانه خالی وجود ندارد، برگردان None
         if not variables:
             return None
             
-        # بررسی k-سازگاری
-        if not check_k_consistency(variables, k):
+        consistent, self.k_stats = KConsistency(self.model, k, max_checks).run()
+        if not consistent:
             return None
             
         # انتخاب خانه با کمترین دامنه
@@ -268,55 +380,20 @@ class GameAnalyzer:
                     
         return selected_move
 
-    def min_conflicts(self, board: List[List[str]], size: int, max_steps: int = 100) -> Optional[Tuple[int, int]]:
-        """الگوریتم کمترین تعارض"""
-        self.initialize_csp(board, size)
-        
-        def count_conflicts(var: Tuple[int, int], value: str) -> int:
-            conflicts = 0
-            for constraint in self.constraints.values():
-                if var in constraint:
-                    for neighbor in constraint:
-                        if neighbor != var and board[neighbor[0]][neighbor[1]] == value:
-                            conflicts += 1
-            return conflicts
-            
-        # مقداردهی اولیه تصادفی
-        assignment = {}
-        for i in range(size):
-            for j in range(size):
-                if board[i][j] == '':
-                    assignment[(i, j)] = random.choice(list(self.domains[(i, j)]))
-        
-        for _ in range(max_steps):
-            # بررسی تعارض‌ها
-            conflicted_vars = []
-            for var in assignment:
-                if count_conflicts(var, assignment[var]) > 0:
-                    conflicted_vars.append(var)
-            
-            if not conflicted_vars:
-                # پیدا کردن اولین خانه خالی که مقداردهی شده
-                for i in range(size):
-                    for j in range(size):
-                        if board[i][j] == '' and (i, j) in assignment:
-                            return (i, j)
-                return None
-                
-            # انتخاب یک متغیر تعارض‌دار
-            var = random.choice(conflicted_vars)
-            
-            # انتخاب مقدار با کمترین تعارض
-            min_conflicts = float('inf')
-            best_value = None
-            for value in self.domains[var]:
-                conflicts = count_conflicts(var, value)
-                if conflicts < min_conflicts:
-                    min_conflicts = conflicts
-                    best_value = value
-                    
-            assignment[var] = best_value
-            
+    def min_conflicts(self, board: List[List[str]], size: int, max_steps: int = 100, tabu_tenure: int = 0,
+                      restart_after: Optional[int] = None, seed: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """الگوریتم کمترین تعارض (جستجوی محلی با شمارنده‌های افزایشی، ممنوعه و شروع دوباره)"""
+        book = self._book_move(board, size)
+        if book is not None:
+            return book
+        self._prepare(board, size)
+
+        search = MinConflicts(self.model, tabu_tenure, restart_after,
+                              random.Random(seed) if seed is not None else None)
+        solution, self.min_conflicts_stats = search.run(max_steps)
+        if solution:
+            # پیدا کردن اولین خانه خالی که مقداردهی شده
+            return min(solution)
         return None
 
     def select_unassigned_variable(self, board: List[List[str]], size: int, assignment: Dict) -> Optional[Tuple[int, int]]:
@@ -327,152 +404,268 @@ class GameAnalyzer:
                     return (i, j)
         return None
 
+    def _variable_order(self, name: str, board, size: int):
+        """ساخت راهبرد انتخاب متغیر و اتصال آن به تغییرات دامنه مدل"""
+        variables = [(i, j) for i in range(size) for j in range(size) if board[i][j] == '']
+        order = make_variable_order(name, self.model, variables)
+        if order:
+            self.model.listener = order.domain_changed
+        return order
+
     def order_domain_values(self, var: Tuple[int, int]) -> List[str]:
         """مرتب‌سازی مقادیر دامنه"""
         return list(self.domains[var])
 
+    def _domain_values(self, var: Tuple[int, int], assignment: Dict, value_order: str) -> List[str]:
+        if value_order == 'default':
+            return self.order_domain_values(var)
+        if value_order == 'lcv':
+            return least_constraining_values(self.model, var, assignment)
+        raise ValueError(f"ترتیب مقدار ناشناخته: {value_order}")
+
     def is_consistent(self, var: Tuple[int, int], value: str, assignment: Dict) -> bool:
         """بررسی سازگاری مقدار با تخصیص فعلی"""
-        for constraint in self.constraints.values():
-            if var in constraint:
-                for neighbor in constraint:
-                    if neighbor in assignment and assignment[neighbor] == value:
-                        return False
-        return True
+        return self._conflicting_neighbor(var, value, assignment) is None
+
+    def _conflicting_neighbor(self, var: Tuple[int, int], value: str, assignment: Dict) -> Optional[Tuple[int, int]]:
+        """اولین همسایه تخصیص‌یافته با همین مقدار، یا None"""
+        for neighbor in self.model.neighbors[var]:
+            if assignment.get(neighbor) == value:
+                return neighbor
+        return None
+
+    def analyze_many(self, boards: Iterable, method: str = 'backtracking_search', workers: int = 1,
+                     **kwargs) -> Iterator:
+        """تحلیل دسته‌ای صفحه‌ها (لیستی، BitBoard یا آرایه (k, N, N)) به صورت جریانی با حافظه ثابت
+
+        workers != 1 کار را بین فرایندها پخش می‌کند (None = همه هسته‌ها)؛ هر فرایند GameAnalyzer خودش
+        را دارد و آمارهای هر فراخوانی (search_nodes، arc_stats و ...) فقط در همان فرایند پر می‌شوند
+        """
+        if method not in CSP_METHODS + SEARCH_METHODS:
+            raise ValueError(f"متد ناشناخته: {method}")
+        if workers != 1:
+            from parallel import analyze_parallel
+            yield from analyze_parallel(boards, method, workers, tablebase_dir=self.tablebase_dir, **kwargs)
+            return
+        analyze = getattr(self, method)
+        player = kwargs.pop('player', None)
+        for board in boards:
+            if not isinstance(board, (BitBoard, list)):
+                # آرایه NumPy؛ evaluator (و numpy) فقط در این حالت بارگذاری می‌شود
+                import evaluator
+                board = evaluator.to_bitboard(board)
+            else:
+                board = as_bitboard(board)
+            if method in SEARCH_METHODS:
+                yield analyze(board, player or side_to_move(board), **kwargs)
+            else:
+                yield analyze(board, board.size, **kwargs)
 
     def create_game_tree(self, board, current_player, depth=3):
         """ایجاد درخت بازی تا عمق مشخص شده"""
         self.graph.clear()
-        self._build_tree(board, current_player, depth)
+        self._tree_stale = True
+        with self._phase('build_tree'):
+            self._build_tree(board, current_player, depth)
         return self.graph
     
-    def _build_tree(self, board, current_player, depth, parent_node=None):
+    def _build_tree(self, board, current_player, depth):
         """ساخت درخت بازی به صورت بازگشتی"""
         if depth == 0:
             return
             
-        board_state = str(board)
-        if parent_node is not None:
-            self.graph.add_edge(parent_node, board_state)
+        bits = as_bitboard(board)
+        board_state = bits.key()
             
         # بررسی تمام حرکات ممکن
-        for i in range(len(board)):
-            for j in range(len(board)):
-                if board[i][j] == '':
-                    # ایجاد یک کپی از صفحه و انجام حرکت
-                    new_board = [row[:] for row in board]
-                    new_board[i][j] = current_player
-                    
-                    # محاسبه امتیاز این حالت
-                    score = self._evaluate_position(new_board, current_player)
-                    
-                    # اضافه کردن به گراف
-                    self.graph.add_node(str(new_board), 
-                                     score=score,
-                                     move=(i, j))
-                    
-                    # ادامه ساخت درخت با عمق کمتر
-                    next_player = 'O' if current_player == 'X' else 'X'
-                    self._build_tree(new_board, next_player, depth-1, str(new_board))
-    
-    def _evaluate_position(self, board, player):
-        """ارزیابی وضعیت فعلی بازی"""
-        size = len(board)
-        score = 0
-        
-        # بررسی ردیف‌ها و ستون‌ها
-        for i in range(size):
-            row_score = self._evaluate_line([board[i][j] for j in range(size)], player)
-            col_score = self._evaluate_line([board[j][i] for j in range(size)], player)
-            score += row_score + col_score
+        next_player = 'O' if current_player == 'X' else 'X'
+        for index in bits.empty_indices():
+            # ایجاد یک کپی از صفحه و انجام حرکت
+            new_board = bits.copy()
+            new_board.play(index, current_player)
             
-        # بررسی قطر اصلی
-        diag1 = [board[i][i] for i in range(size)]
-        score += self._evaluate_line(diag1, player)
-        
-        # بررسی قطر فرعی
-        diag2 = [board[i][size-1-i] for i in range(size)]
-        score += self._evaluate_line(diag2, player)
-        
-        return score
-    
-    def _evaluate_line(self, line, player):
-        """ارزیابی یک خط (ردیف، ستون یا قطر)"""
-        opponent = 'O' if player == 'X' else 'X'
-        score = 0
-        
-        # شمارش تعداد مهره‌های بازیکن و حریف
-        player_count = line.count(player)
-        opponent_count = line.count(opponent)
-        empty_count = line.count('')
-        
-        # محاسبه امتیاز
-        if player_count == len(line):
-            score += 100  # برد
-        elif opponent_count == len(line):
-            score -= 100  # باخت
-        elif player_count == len(line) - 1 and empty_count == 1:
-            score += 10   # یک حرکت تا برد
-        elif opponent_count == len(line) - 1 and empty_count == 1:
-            score -= 10   # یک حرکت تا باخت
+            # محاسبه امتیاز این حالت
+            score = new_board.evaluate(current_player)
+            
+            # اضافه کردن به گراف (یال از وضعیت والد تا نمای لایه‌ای ساختار درخت را داشته باشد)
+            self.graph.add_node(new_board.key(), 
+                             score=score,
+                             move=divmod(index, bits.size))
+            self.graph.add_edge(board_state, new_board.key())
             
-        return score
+            # ادامه ساخت درخت با عمق کمتر
+            self._build_tree(new_board, next_player, depth-1)
     
-    def suggest_move(self, board, player):
-        """پیشنهاد بهترین حرکت با استفاده از درخت بازی"""
-        self.create_game_tree(board, player)
-        
-        # یافتن بهترین حرکت با استفاده از الگوریتم مینیمکس
-        best_score = float('-inf')
-        best_move = None
-        
-        for node in self.graph.nodes():
-            if self.graph.in_degree(node) == 0:  # گره‌های ریشه
-                score = self._minimax(node, True)
-                if score > best_score:
-                    best_score = score
-                    best_move = self.graph.nodes[node].get('move')
-        
-        return best_move
+    def _evaluate_position(self, board, player):
+        """ارزیابی وضعیت فعلی بازی (قواعد امتیاز فقط در BitBoard.evaluate و نسخه برداری evaluator)"""
+        if not isinstance(board, (BitBoard, list)):
+            import evaluator
+            return evaluator.evaluate(board, player)
+        return as_bitboard(board).evaluate(player)
     
-    def _minimax(self, node, is_maximizing):
-        """الگوریتم مینیمکس برای پیدا کردن بهترین حرکت"""
-        if self.graph.out_degree(node) == 0:  # گره برگ
-            return self.graph.nodes[node].get('score', 0)
-            
-        if is_maximizing:
-            best_score = float('-inf')
-            for child in self.graph.successors(node):
-                score = self._minimax(child, False)
-                best_score = max(score, best_score)
-            return best_score
+    def suggest_move(self, board, player, depth=None, time_limit=None, workers=1, parallel='smp',
+                     stop=None, progress=None):
+        """پیشنهاد بهترین حرکت با جستجوی نگامکس آلفا-بتا"""
+        return self.search(board, player, depth, time_limit, workers, parallel, stop, progress).move
+
+    def search(self, board, player, depth=None, time_limit=None, workers=1, parallel='smp',
+               stop=None, progress=None) -> SearchResult:
+        """جستجوی مستقیم بدون ساخت گراف؛ حرکت، دنباله اصلی و تعداد گره‌ها را برمی‌گرداند
+
+        workers=1 جستجوی تک‌فرایندی قطعی است؛ در غیر این صورت parallel='smp' (جدول جابجایی
+        مشترک) یا 'root' (تقسیم حرکات ریشه) و با پایان مهلت بهترین حرکت تاکنون برمی‌گردد؛
+        اگر new_game با همین تعداد کارگر فراخوانده شده باشد فرایندها و جدول مشترک آن استفاده می‌شوند؛
+        stop در همه حالت‌ها جستجو را متوقف می‌کند و progress(گره‌ها، عمق) در حالت موازی از کارگر صفر
+        (smp) یا پس از هر عمق ریشه (root) می‌آید
+        """
+        with self._phase('book'):
+            hit = self._book_probe(board, len(board), player)
+        if hit is None:
+            with self._phase('threats'):
+                hit = self.forced_move(board, player)
+        if progress is None and self.instrumentation is not None and self.instrumentation.tracer is not None:
+            trace = self.instrumentation.trace
+            progress = lambda nodes, depth: trace('progress', nodes=nodes, depth=depth)  # noqa: E731
+        if hit is not None:
+            move, result, distance = hit
+            score = 0
+            if result == WIN:
+                score = WIN_SCORE - distance
+            elif result == LOSS:
+                score = distance - WIN_SCORE
+            elif result == UNKNOWN:
+                # سد ساده: نتیجه نامعلوم است؛ ارزیابی ایستای موقعیت پس از سد
+                child = as_bitboard(board).copy()
+                child.set(move[0], move[1], player)
+                score = self._evaluate_position(child, player)
+            self.last_search = SearchResult(move, score, [move], 0, distance)
+        elif workers != 1:
+            from parallel import PARALLEL_MODES, default_workers, lazy_smp_search, root_split_search
+            if parallel not in PARALLEL_MODES:
+                raise ValueError(f"حالت موازی ناشناخته: {parallel}")
+            pool = self.pool
+            if pool is not None and (workers or default_workers()) != pool.workers:
+                pool = None
+            with self._phase('search'):
+                if pool is not None and parallel == 'smp':
+                    self.last_search = pool.smp_search(board, player, depth, time_limit, stop, progress)
+                elif pool is not None:
+                    self.last_search = pool.root_split_search(board, player, depth, time_limit, stop, progress)
+                elif parallel == 'smp':
+                    self.last_search = lazy_smp_search(board, player, depth, workers, time_limit, stop=stop,
+                                                       progress=progress)
+                else:
+                    self.last_search = root_split_search(board, player, depth, workers, time_limit, stop,
+                                                         progress)
         else:
-            best_score = float('inf')
-            for child in self.graph.successors(node):
-                score = self._minimax(child, True)
-                best_score = min(score, best_score)
-            return best_score
+            with self._phase('search'):
+                self.last_search = self.engine.search(board, player, depth, time_limit, stop, progress)
+        return self.last_search
     
-    def visualize_tree(self):
-        """نمایش گراف درخت بازی"""
-        plt.figure(figsize=(12, 8))
-        pos = nx.spring_layout(self.graph)
-        
-        # رسم گره‌ها
-        nx.draw_networkx_nodes(self.graph, pos, 
-                             node_color='lightblue',
-                             node_size=500)
-        
-        # رسم یال‌ها
-        nx.draw_networkx_edges(self.graph, pos, 
-                             edge_color='gray',
-                             arrows=True)
-        
-        # اضافه کردن برچسب‌ها
-        labels = {node: f"Score: {self.graph.nodes[node].get('score', 0)}" 
-                 for node in self.graph.nodes()}
-        nx.draw_networkx_labels(self.graph, pos, labels)
-        
-        plt.title("درخت بازی")
-        plt.axis('off')
-        plt.show() 
\ No newline at end of file
+    def enable_instrumentation(self, tracer: Optional[Tracer] = None) -> Instrumentation:
+        """روشن کردن زمان‌سنجی مراحل و tracer(رویداد، داده‌ها) برای پیشرفت زنده"""
+        self.instrumentation = Instrumentation(tracer)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        self.instrumentation = None
+
+    def _phase(self, name: str):
+        """زمینه زمان‌سنجی یک مرحله؛ وقتی ابزارسنجی خاموش است یک زمینه بی‌اثر مشترک"""
+        if self.instrumentation is None:
+            return DISABLED
+        return self.instrumentation.phase(name)
+
+    def _counter_snapshot(self) -> Dict[str, int]:
+        """شمارنده‌های همیشه‌روشن که آمار هر فراخوانی از تفاضل آن‌ها به دست می‌آید"""
+        return {
+            'prunings': sum(model.prunings for model in self._models.values()),
+            'tt_probes': self.tt.probes,
+            'tt_hits': self.tt.hits,
+        }
+
+    def analyze(self, method: str, board, *args, **kwargs) -> AnalysisResult:
+        """اجرای یک متد تحلیلگر و برگرداندن نتیجه آن همراه با شمارنده‌ها و زمان مراحل
+
+        شمارنده‌ها: nodes، backtracks، prunings، queue_pushes، revisions، evaluations و tt_hits/tt_probes
+        """
+        if method not in INSTRUMENTED_METHODS:
+            raise ValueError(f"متد ناشناخته: {method}")
+        previous = self.instrumentation
+        instrumentation = previous or Instrumentation()
+        instrumentation.reset()
+        self.instrumentation = instrumentation
+        self.search_nodes = self.search_backtracks = self.engine.evaluations = 0
+        self.arc_stats = self.propagation_stats = self.k_stats = self.min_conflicts_stats = None
+        self.last_search = None
+        before = self._counter_snapshot()
+        start = time.perf_counter()
+        try:
+            move = getattr(self, method)(board, *args, **kwargs)
+        finally:
+            self.instrumentation = previous
+        seconds = time.perf_counter() - start
+
+        after = self._counter_snapshot()
+        counters = {name: after[name] - before[name] for name in after}
+        counters.update(nodes=self.search_nodes, backtracks=self.search_backtracks,
+                        evaluations=self.engine.evaluations)
+        if self.last_search is not None:
+            counters['nodes'] = self.last_search.nodes
+        if isinstance(move, MCTSResult):
+            counters.update(nodes=move.nodes, playouts=move.playouts)
+        if method == 'create_game_tree':
+            counters['nodes'] = self.graph.number_of_nodes()
+        if self.arc_stats is not None:
+            counters.update(queue_pushes=self.arc_stats.pushes, revisions=self.arc_stats.revisions)
+        if self.propagation_stats is not None:
+            counters.update(queue_pushes=self.propagation_stats.pushes,
+                            revisions=self.propagation_stats.revisits)
+        if self.k_stats is not None:
+            counters.update(revisions=self.k_stats.checks)
+        if self.min_conflicts_stats is not None:
+            counters.update(nodes=self.min_conflicts_stats.steps, restarts=self.min_conflicts_stats.restarts)
+        return AnalysisResult(method, move, counters, dict(instrumentation.phases), seconds)
+
+    def mcts_search(self, board, player, time_limit=None, playouts=None, stop=None, progress=None) -> MCTSResult:
+        """جستجوی مونت‌کارلو برای صفحه‌های بزرگ؛ زیر درخت موقعیت فعلی از حرکت قبل دوباره استفاده می‌شود"""
+        forced = self.forced_move(board, player)
+        if forced is not None:
+            move, result, _ = forced
+            win_rate = 1.0 if result == WIN else 0.0 if result == LOSS else 0.5
+            return MCTSResult(move, win_rate, 0, 0.0, self.mcts.nodes)
+        return self.mcts.search(board, player, time_limit, playouts, stop, progress)
+
+    def threats(self, board, player: str) -> Threats:
+        """برد فوری، سد اجباری و تهدیدهای دوگانه هر دو طرف از شمارنده‌های خطوط مدل"""
+        self._prepare(board, len(board))
+        return ThreatDetector(self.model).threats(player)
+
+    def forced_move(self, board, player: str) -> Optional[Tuple[Tuple[int, int], int, int]]:
+        """(حرکت، نتیجه، فاصله) اگر حرکت اجباری باشد، وگرنه None؛ نتیجه سد ساده UNKNOWN است
+
+        ترتیب: برد فوری، سد برد حریف (با دو تهدید حریف باخت قطعی است) و تهدید دوگانه خودی
+        """
+        self._prepare(board, len(board))
+        detector = ThreatDetector(self.model)
+        wins = detector.winning_cells(player)
+        if wins:
+            return wins[0], WIN, 1
+        blocks = detector.winning_cells('O' if player == 'X' else 'X')
+        if len(blocks) > 1:
+            return blocks[0], LOSS, 2
+        if blocks:
+            return blocks[0], UNKNOWN, 0
+        forks = detector.fork_cells(player)
+        if forks:
+            return forks[0], WIN, 3
+        return None
+
+    def visualize_tree(self, parent=None, budget: Optional[int] = None):
+        """نمایش لایه‌ای درخت بازی با جمع شدن زیردرخت‌ها پس از budget گره (matplotlib فقط در این لحظه بارگذاری می‌شود)"""
+        from graph_visualizer import draw_game_tree
+        if self._tree_stale and self._tree_view is not None:
+            self._tree_view.set_graph(self.graph)
+        self._tree_stale = False
+        self._tree_view = draw_game_tree(self.graph, parent, budget, self._tree_view)
+        return self._tree_view
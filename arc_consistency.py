@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Dict, NamedTuple, Tuple
+
+from csp_model import Cell, CSPModel
+
+VALUE_ORDER = ('X', 'O')  # ترتیب ثابت مقادیر برای اشاره‌گرهای AC-2001
+
+
+class ArcConsistencyStats(NamedTuple):
+    """آمار اجرای سازگاری قوس"""
+    revisions: int       # تعداد قوس‌هایی که دامنه را کوچک کردند
+    arcs_processed: int  # تعداد قوس‌های برداشته‌شده از صف
+    peak_queue: int      # بیشترین طول صف
+    pushes: int          # تعداد قوس‌های افزوده‌شده به صف
+
+
+class ArcConsistency:
+    """سازگاری قوس روی مدل CSP: AC-3 با صف deque و مجموعه عضویت، یا AC-2001 با آخرین پشتیبان"""
+
+    def __init__(self, model: CSPModel, algorithm: str = 'ac3'):
+        if algorithm not in ('ac3', 'ac2001'):
+            raise ValueError(f"الگوریتم ناشناخته: {algorithm}")
+        self.model = model
+        self.algorithm = algorithm
+        # last[(x, y, value_x)] = آخرین مقدار پشتیبان value_x در دامنه y
+        self._last: Dict[Tuple[Cell, Cell, str], str] = {}
+
+    def _supported(self, x: Cell, y: Cell, value_x: str) -> bool:
+        domain_y = self.model.domains[y]
+        if self.algorithm == 'ac3':
+            for value_y in domain_y:
+                if value_x != value_y:
+                    return True
+            return False
+
+        # AC-2001: اگر پشتیبان قبلی هنوز در دامنه است دوباره جستجو نکن
+        key = (x, y, value_x)
+        last = self._last.get(key)
+        if last is not None and last in domain_y:
+            return True
+        start = VALUE_ORDER.index(last) + 1 if last is not None else 0
+        for value_y in VALUE_ORDER[start:]:
+            if value_y in domain_y and value_x != value_y:
+                self._last[key] = value_y
+                return True
+        return False
+
+    def revise(self, x: Cell, y: Cell) -> bool:
+        """حذف مقادیر بدون پشتیبان از دامنه x (از طریق trail مدل)"""
+        revised = False
+        for value_x in list(self.model.domains[x]):
+            if not self._supported(x, y, value_x):
+                self.model.prune(x, value_x)
+                revised = True
+        return revised
+
+    def run(self) -> Tuple[bool, ArcConsistencyStats]:
+        """اجرا تا نقطه ثابت؛ False اگر دامنه‌ای خالی شود"""
+        model = self.model
+        self._last = {}
+        queue = deque()
+        queued = set()
+
+        # اضافه کردن قوس‌های بین خانه‌های خالی هر خط (هر جفت خانه حداکثر در یک خط مشترک‌اند)
+        for constraint in model.constraints.values():
+            empty = [cell for cell in constraint if model.value(cell) == '']
+            for i in range(len(empty)):
+                for j in range(i + 1, len(empty)):
+                    for arc in ((empty[i], empty[j]), (empty[j], empty[i])):
+                        if arc not in queued:
+                            queued.add(arc)
+                            queue.append(arc)
+
+        pushes = len(queue)
+        revisions = 0
+        processed = 0
+        peak = len(queue)
+        ok = True
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            processed += 1
+            x, y = arc
+            if self.revise(x, y):
+                revisions += 1
+                if not model.domains[x]:
+                    ok = False
+                    break
+                for z in model.neighbors[x]:
+                    if z != y and model.value(z) == '':
+                        arc = (z, x)
+                        if arc not in queued:
+                            queued.add(arc)
+                            queue.append(arc)
+                            pushes += 1
+                if len(queue) > peak:
+                    peak = len(queue)
+        return ok, ArcConsistencyStats(revisions, processed, peak, pushes)
@@ -0,0 +1,86 @@
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+POLL_MS = 50  # فاصله بررسی صف نتایج در حلقه Tk
+
+
+class Job:
+    """یک کار پس‌زمینه با پرچم توقف؛ فراخوان‌ها روی رشته Tk اجرا می‌شوند"""
+
+    def __init__(self, func: Callable[['Job'], Any], on_done: Optional[Callable[[Any], None]],
+                 on_progress: Optional[Callable[..., None]], cancellable: bool):
+        self.func = func
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.cancellable = cancellable
+        self.stop = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.stop.is_set()
+
+
+class BackgroundRunner:
+    """اجرای کارهای تحلیلگر به ترتیب روی یک رشته پس‌زمینه؛ نتایج با صف و root.after به Tk برمی‌گردند
+
+    همه دسترسی‌ها به GameAnalyzer از همین رشته انجام می‌شود تا مدل و جدول جابجایی هم‌زمان تغییر نکنند
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._jobs: 'queue.Queue[Job]' = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        # کارهای قابل لغوی که نتیجه‌شان هنوز تحویل نشده (فقط از رشته Tk خوانده و نوشته می‌شود)
+        self._pending: List[Job] = []
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(POLL_MS, self._poll)
+
+    def submit(self, func: Callable[[Job], Any], on_done: Optional[Callable[[Any], None]] = None,
+               on_progress: Optional[Callable[..., None]] = None, cancellable: bool = True) -> Job:
+        """اجرای func(job) در پس‌زمینه؛ on_done(نتیجه) و on_progress(*args) روی رشته Tk صدا زده می‌شوند"""
+        job = Job(func, on_done, on_progress, cancellable)
+        if cancellable:
+            self._pending.append(job)
+        self._jobs.put(job)
+        return job
+
+    def report(self, job: Job, *args):
+        """ارسال پیشرفت از رشته پس‌زمینه؛ ویجت‌ها فقط در _poll لمس می‌شوند"""
+        self._results.put((job, 'progress', args))
+
+    def cancel(self):
+        """لغو همه کارهای قابل لغو؛ کار در حال اجرا با پرچم stop متوقف و نتیجه‌اش دور ریخته می‌شود"""
+        for job in self._pending:
+            job.stop.set()
+        self._pending = []
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job.cancelled:
+                continue
+            try:
+                self._results.put((job, 'done', job.func(job)))
+            except Exception as error:
+                self._results.put((job, 'error', error))
+
+    def _poll(self):
+        try:
+            while True:
+                job, kind, payload = self._results.get_nowait()
+                if job.cancelled:
+                    continue
+                if kind == 'progress':
+                    if job.on_progress is not None:
+                        job.on_progress(*payload)
+                    continue
+                if job in self._pending:
+                    self._pending.remove(job)
+                if kind == 'error':
+                    self.root.report_callback_exception(type(payload), payload, payload.__traceback__)
+                elif job.on_done is not None:
+                    job.on_done(payload)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self._poll)
@@ -0,0 +1,107 @@
+"""شمارش گره‌ها و زمان هر گره در جستجوی پس‌گرد و بررسی رو به جلو
+
+اجرا: python benchmarks/csp_nodes.py [--positions 200] [--repeat 3] [--seed 1] [--sizes 8,12,16,20] [--compare]
+در وضعیت‌ها هر خط حداکثر دو خانه خالی دارد تا جستجو تا عمق کامل پیش برود (هزاران گره در هر ردیف)؛
+با --compare همان جستجوها با بررسی پایان قدیمی (پیمایش کل صفحه در هر گره) هم اجرا و زمان‌ها کنار هم چاپ می‌شوند
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms import GameAnalyzer  # noqa: E402
+from csp_model import csp_structure  # noqa: E402
+
+
+class LegacyCompletionAnalyzer(GameAnalyzer):
+    """GameAnalyzer با بررسی پایان قدیمی: در هر گره خانه‌های خالی کل صفحه شمرده می‌شوند"""
+
+    def _prepare(self, board, size: int):
+        self._legacy_board = board
+        super()._prepare(board, size)
+
+    @property
+    def search_nodes(self) -> int:
+        return self._search_nodes
+
+    @search_nodes.setter
+    def search_nodes(self, value: int):
+        # search_nodes در هر گره یک بار افزایش می‌یابد؛ همان‌جا پیمایش قدیمی انجام می‌شود
+        board = getattr(self, '_legacy_board', None)
+        if board is not None:
+            size = len(board)
+            len(self._legacy_assignment) == sum(1 for i in range(size) for j in range(size) if board[i][j] == '')
+        self._search_nodes = value
+
+    # اندازه assignment در هزینه پیمایش اثری ندارد؛ یک دیکشنری خالی جای آن می‌نشیند
+    _legacy_assignment: dict = {}
+
+
+def random_positions(size: int, count: int, rng: random.Random):
+    """وضعیت‌های تصادفی که هر خط حداکثر دو خانه خالی دارد (با سه خانه خالی در یک خط جستجو فوراً شکست می‌خورد)
+
+    خانه‌های خالی به ترتیب تصادفی تا سقف size خانه انتخاب و بقیه صفحه یکی در میان با X و O پر می‌شود
+    """
+    names = csp_structure(size)[1]
+    for _ in range(count):
+        empties = set()
+        load = {}
+        for cell in rng.sample(range(size * size), size * size):
+            cell = divmod(cell, size)
+            if all(load.get(name, 0) < 2 for name in names[cell]):
+                empties.add(cell)
+                for name in names[cell]:
+                    load[name] = load.get(name, 0) + 1
+                if len(empties) == size:
+                    break
+        board = [['' if (i, j) in empties else 'XO'[(i + j) % 2] for j in range(size)] for i in range(size)]
+        yield board
+
+
+def run(analyzer: GameAnalyzer, method: str, order: str, positions, size: int, repeat: int = 1):
+    """(گره‌ها، ثانیه) برای اجرای یک روش روی همه وضعیت‌ها؛ کمینه زمان repeat اجرا گزارش می‌شود"""
+    best = float('inf')
+    for _ in range(repeat):
+        nodes = 0
+        start = time.perf_counter()
+        for board in positions:
+            getattr(analyzer, method)(board, size, order)
+            nodes += analyzer.search_nodes
+        best = min(best, time.perf_counter() - start)
+    return nodes, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3, help='تعداد اجراها (کمینه زمان گزارش می‌شود)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sizes', default='8,12,16,20')
+    parser.add_argument('--compare', action='store_true', help='اجرای دوباره با بررسی پایان قدیمی O(N²)')
+    args = parser.parse_args(argv)
+
+    analyzer = GameAnalyzer(tablebase_dir=None)
+    legacy = LegacyCompletionAnalyzer(tablebase_dir=None) if args.compare else None
+    header = f"{'N':>3} {'method':<20} {'order':<8} {'nodes':>10} {'seconds':>9} {'us/node':>9}"
+    if args.compare:
+        header += f" {'old sec':>9} {'speedup':>8}"
+    print(header)
+    for size in (int(n) for n in args.sizes.split(',')):
+        positions = list(random_positions(size, args.positions, random.Random(args.seed * 100 + size)))
+        for method in ('backtracking_search', 'forward_checking'):
+            for order in ('static', 'mrv', 'domwdeg'):
+                nodes, elapsed = run(analyzer, method, order, positions, size, args.repeat)
+                row = (f"{size:>3} {method:<20} {order:<8} {nodes:>10} {elapsed:>9.3f} "
+                       f"{elapsed / max(nodes, 1) * 1e6:>9.1f}")
+                if legacy is not None:
+                    old_nodes, old = run(legacy, method, order, positions, size, args.repeat)
+                    assert old_nodes == nodes, (old_nodes, nodes)
+                    row += f" {old:>9.3f} {old / max(elapsed, 1e-9):>7.2f}x"
+                print(row)
+
+
+if __name__ == '__main__':
+    main()
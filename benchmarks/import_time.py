@@ -0,0 +1,50 @@
+"""سنجش زمان بارگذاری سرد موتور (import algorithms) در مفسر تازه و بررسی بودجه آن
+
+اجرا: python benchmarks/import_time.py [--repeat 5] [--budget 0.1]
+کد خروج ۱ یعنی بودجه زمانی رد شده یا کتابخانه سنگینی هنگام بارگذاری موتور وارد شده است
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# این کتابخانه‌ها فقط هنگام رسم یا ارزیابی برداری بارگذاری می‌شوند
+HEAVY = ('matplotlib', 'networkx', 'numpy', 'tkinter')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str = 'algorithms') -> dict:
+    """یک بارگذاری در مفسر تازه (بدون کش ماژول‌ها، با bytecode کامپایل‌شده)"""
+    output = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='algorithms')
+    parser.add_argument('--repeat', type=int, default=5, help='تعداد اجراها (کمینه گزارش می‌شود)')
+    parser.add_argument('--budget', type=float, default=0.1, help='سقف مجاز زمان بارگذاری به ثانیه')
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    seconds = min(run['seconds'] for run in runs)
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    print(f"import {args.module}: {seconds * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    if loaded:
+        print(f"heavy modules loaded: {', '.join(loaded)}")
+    return 1 if seconds > args.budget or loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
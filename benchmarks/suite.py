@@ -0,0 +1,186 @@
+"""مجموعه سنجش همه الگوریتم‌های GameAnalyzer روی صفحه‌های 3x3 تا 10x10 با خروجی JSON
+
+اجرا: python benchmarks/suite.py [--positions 5] [--seed 1] [-o result.json] [--baseline base.json]
+با --baseline کد خروج ۱ یعنی حداقل یک معیار بیش از --threshold بدتر شده است
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms import CSP_METHODS, GameAnalyzer  # noqa: E402
+from bitboard import BitBoard  # noqa: E402
+from tablebase import side_to_move  # noqa: E402
+
+METHODS = CSP_METHODS + ('suggest_move',)
+FILLS = (0.2, 0.4, 0.6)
+METRICS = ('seconds', 'nodes', 'revisions', 'peak_kb')
+
+
+def corpus(size: int, fill: float, count: int, seed: int):
+    """وضعیت‌های ثابت با بذر مشخص: X و O به نوبت (X شروع‌کننده) تا پرشدگی fill"""
+    rng = random.Random(f"{seed}:{size}:{fill}")
+    for _ in range(count):
+        board = BitBoard(size)
+        for k, cell in enumerate(rng.sample(range(size * size), int(size * size * fill))):
+            board.play(cell, 'X' if k % 2 == 0 else 'O')
+        yield board
+
+
+def _reset(analyzer: GameAnalyzer, method: str):
+    if method == 'suggest_move':
+        # جدول جابجایی خالی برای هر وضعیت تا تعداد گره‌ها به ترتیب اجرا وابسته نباشد
+        analyzer.new_game()
+
+
+def _run(analyzer: GameAnalyzer, method: str, board: BitBoard, depth: int, seed: int):
+    size = board.size
+    if method == 'suggest_move':
+        return analyzer.suggest_move(board, side_to_move(board), depth=depth)
+    if method == 'min_conflicts':
+        return analyzer.min_conflicts(board, size, seed=seed)
+    return getattr(analyzer, method)(board, size)
+
+
+def _counters(analyzer: GameAnalyzer, method: str):
+    """(گره‌ها، بازبینی‌ها) آخرین اجرا؛ هر الگوریتم شمارنده خودش را دارد"""
+    if method in ('backtracking_search', 'forward_checking'):
+        return analyzer.search_nodes, 0
+    if method == 'suggest_move':
+        return analyzer.last_search.nodes, 0
+    if method == 'arc_consistency' and analyzer.arc_stats:
+        return analyzer.arc_stats.arcs_processed, analyzer.arc_stats.revisions
+    if method == 'constraint_propagation' and analyzer.propagation_stats:
+        return 0, analyzer.propagation_stats.revisits
+    if method == 'k_consistency' and analyzer.k_stats:
+        return analyzer.k_stats.subsets, analyzer.k_stats.checks
+    if method == 'min_conflicts' and analyzer.min_conflicts_stats:
+        return analyzer.min_conflicts_stats.steps, analyzer.min_conflicts_stats.restarts
+    return 0, 0
+
+
+def measure(analyzer: GameAnalyzer, method: str, boards, depth: int, seed: int, repeat: int = 3) -> dict:
+    """زمان (کمینه repeat گذر) و شمارنده‌ها بدون tracemalloc و اوج حافظه در گذری جدا (بدون هزینه آماده‌سازی)"""
+    seconds = None
+    for _ in range(repeat):
+        nodes = revisions = 0
+        total = 0.0
+        for board in boards:
+            _reset(analyzer, method)
+            start = time.perf_counter()
+            _run(analyzer, method, board, depth, seed)
+            total += time.perf_counter() - start
+            n, r = _counters(analyzer, method)
+            nodes += n
+            revisions += r
+        seconds = total if seconds is None else min(seconds, total)
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for board in boards:
+            _reset(analyzer, method)
+            tracemalloc.reset_peak()
+            _run(analyzer, method, board, depth, seed)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(seconds, 6), 'nodes': nodes, 'revisions': revisions,
+            'peak_kb': round(peak / 1024, 1)}
+
+
+def run_suite(sizes, fills, methods, positions: int, seed: int, depth: int, tablebase: bool,
+              repeat: int = 3) -> dict:
+    analyzer = GameAnalyzer() if tablebase else GameAnalyzer(tablebase_dir=None)
+    results = []
+    for size in sizes:
+        for fill in fills:
+            boards = list(corpus(size, fill, positions, seed))
+            for method in methods:
+                row = {'method': method, 'size': size, 'fill': fill, 'positions': len(boards)}
+                row.update(measure(analyzer, method, boards, depth, seed, repeat))
+                results.append(row)
+                print(f"{method:<24} N={size:<3} fill={fill:<4} " +
+                      ' '.join(f"{name}={row[name]}" for name in METRICS), file=sys.stderr)
+    return {
+        'meta': {'seed': seed, 'positions': positions, 'depth': depth, 'tablebase': tablebase, 'repeat': repeat,
+                 'python': platform.python_version(), 'machine': platform.machine()},
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_seconds: float = 0.005) -> int:
+    """چاپ نسبت هر معیار به خط پایه؛ تعداد ردیف‌هایی که بیش از threshold بدتر شده‌اند
+
+    زمان‌های کمتر از min_seconds نویز اندازه‌گیری‌اند و در تشخیص کندی شمرده نمی‌شوند
+    """
+    base = {(r['method'], r['size'], r['fill']): r for r in baseline['results']}
+    regressions = 0
+    print(f"{'method':<24} {'N':>3} {'fill':>5} " + ' '.join(f"{name:>12}" for name in METRICS))
+    for row in current['results']:
+        old = base.get((row['method'], row['size'], row['fill']))
+        if old is None:
+            continue
+        ratios = []
+        worse = False
+        for name in METRICS:
+            if old[name]:
+                ratio = row[name] / old[name]
+                ratios.append(f"{ratio:>11.2f}x")
+                if name != 'seconds' or max(row[name], old[name]) >= min_seconds:
+                    worse = worse or ratio > 1 + threshold
+            else:
+                ratios.append(f"{'-' if not row[name] else 'new':>12}")
+        regressions += worse
+        print(f"{row['method']:<24} {row['size']:>3} {row['fill']:>5} " + ' '.join(ratios) +
+              ('  <-- regression' if worse else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='3,4,5,6,7,8,9,10')
+    parser.add_argument('--fills', default=','.join(str(f) for f in FILLS))
+    parser.add_argument('--methods', default=','.join(METHODS))
+    parser.add_argument('--positions', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--depth', type=int, default=3, help='عمق suggest_move')
+    parser.add_argument('--tablebase', action='store_true', help='استفاده از جدول‌های پایانی')
+    parser.add_argument('-o', '--output', help='مسیر فایل JSON (پیش‌فرض: خروجی استاندارد)')
+    parser.add_argument('--baseline', help='فایل JSON ذخیره‌شده برای مقایسه')
+    parser.add_argument('--repeat', type=int, default=3, help='تعداد گذرهای زمان‌سنجی (کمینه گزارش می‌شود)')
+    parser.add_argument('--threshold', type=float, default=0.10, help='کندی مجاز نسبت به خط پایه')
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='زمان‌های کوتاه‌تر مقایسه نمی‌شوند')
+    args = parser.parse_args(argv)
+
+    methods = args.methods.split(',')
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        parser.error(f"متد ناشناخته: {', '.join(sorted(unknown))}")
+    report = run_suite([int(n) for n in args.sizes.split(',')], [float(f) for f in args.fills.split(',')],
+                       methods, args.positions, args.seed, args.depth, args.tablebase, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    elif not args.baseline:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_seconds)
+        print(f"{regressions} regression(s)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+
+@lru_cache(maxsize=None)
+def line_cells(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """اندیس خطی خانه‌های هر خط: ردیف‌ها، ستون‌ها، قطر اصلی و قطر فرعی"""
+    lines = []
+    for i in range(size):
+        lines.append(tuple(i * size + j for j in range(size)))
+    for j in range(size):
+        lines.append(tuple(i * size + j for i in range(size)))
+    lines.append(tuple(i * size + i for i in range(size)))
+    lines.append(tuple(i * size + size - 1 - i for i in range(size)))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def line_names(size: int) -> Tuple[str, ...]:
+    """نام خطوط به همان ترتیب line_cells (مطابق کلیدهای initialize_csp)"""
+    return (tuple(f'row_{i}' for i in range(size)) +
+            tuple(f'col_{j}' for j in range(size)) +
+            ('diag1', 'diag2'))
+
+
+@lru_cache(maxsize=None)
+def line_masks(size: int) -> Tuple[int, ...]:
+    """ماسک بیتی هر خط برای صفحه size×size"""
+    return tuple(sum(1 << cell for cell in cells) for cells in line_cells(size))
+
+
+@lru_cache(maxsize=None)
+def cell_lines(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """برای هر خانه، اندیس خطوطی که از آن می‌گذرند"""
+    lines = [[] for _ in range(size * size)]
+    for index, cells in enumerate(line_cells(size)):
+        for cell in cells:
+            lines[cell].append(index)
+    return tuple(tuple(ls) for ls in lines)
+
+
+@lru_cache(maxsize=None)
+def cell_line_masks(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """برای هر خانه، ماسک خطوطی که از آن می‌گذرند (حداکثر چهار خط)"""
+    masks = line_masks(size)
+    return tuple(tuple(masks[line] for line in ls) for ls in cell_lines(size))
+
+
+class _RowView:
+    """نمای یک ردیف از BitBoard تا کد قدیمی بتواند board[i][j] بنویسد"""
+    __slots__ = ('_board', '_row')
+
+    def __init__(self, board: 'BitBoard', row: int):
+        self._board = board
+        self._row = row
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self._board.get(self._row, c) for c in range(self._board.size)[col]]
+        if col < 0:
+            col += self._board.size
+        return self._board.get(self._row, col)
+
+    def __setitem__(self, col: int, symbol: str):
+        self._board.set(self._row, col, symbol)
+
+    def __len__(self) -> int:
+        return self._board.size
+
+    def __iter__(self) -> Iterator[str]:
+        for col in range(self._board.size):
+            yield self._board.get(self._row, col)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class BitBoard:
+    """صفحه بازی فشرده با دو ماسک بیتی: یکی برای X و یکی برای O"""
+    __slots__ = ('size', 'x', 'o', 'full', 'lines', 'cell_masks')
+
+    def __init__(self, size: int, x: int = 0, o: int = 0):
+        self.size = size
+        self.x = x
+        self.o = o
+        self.full = (1 << (size * size)) - 1
+        self.lines = line_masks(size)
+        self.cell_masks = cell_line_masks(size)
+
+    @classmethod
+    def from_list(cls, board: List[List[str]]) -> 'BitBoard':
+        """ساخت BitBoard از صفحه لیستی تو در تو"""
+        size = len(board)
+        x = o = 0
+        for i in range(size):
+            for j in range(size):
+                if board[i][j] == 'X':
+                    x |= 1 << (i * size + j)
+                elif board[i][j] == 'O':
+                    o |= 1 << (i * size + j)
+        return cls(size, x, o)
+
+    def to_list(self) -> List[List[str]]:
+        """تبدیل به صفحه لیستی تو در تو"""
+        return [[self.get(i, j) for j in range(self.size)] for i in range(self.size)]
+
+    def copy(self) -> 'BitBoard':
+        return BitBoard(self.size, self.x, self.o)
+
+    def key(self) -> Tuple[int, int]:
+        """کلید یکتای وضعیت صفحه"""
+        return self.x, self.o
+
+    def get(self, row: int, col: int) -> str:
+        bit = 1 << (row * self.size + col)
+        if self.x & bit:
+            return 'X'
+        if self.o & bit:
+            return 'O'
+        return ''
+
+    def set(self, row: int, col: int, symbol: str):
+        """قرار دادن یا پاک کردن (symbol='') یک خانه"""
+        bit = 1 << (row * self.size + col)
+        self.x &= ~bit
+        self.o &= ~bit
+        if symbol == 'X':
+            self.x |= bit
+        elif symbol == 'O':
+            self.o |= bit
+
+    def play(self, index: int, symbol: str):
+        """انجام حرکت روی خانه خالی با اندیس خطی"""
+        if symbol == 'X':
+            self.x |= 1 << index
+        else:
+            self.o |= 1 << index
+
+    def unplay(self, index: int, symbol: str):
+        """برگرداندن حرکت play"""
+        if symbol == 'X':
+            self.x &= ~(1 << index)
+        else:
+            self.o &= ~(1 << index)
+
+    def mask(self, symbol: str) -> int:
+        return self.x if symbol == 'X' else self.o
+
+    @property
+    def empty(self) -> int:
+        """ماسک خانه‌های خالی"""
+        return self.full & ~(self.x | self.o)
+
+    def empty_indices(self) -> Iterator[int]:
+        """اندیس خطی خانه‌های خالی به ترتیب ردیفی"""
+        empty = self.empty
+        while empty:
+            low = empty & -empty
+            yield low.bit_length() - 1
+            empty ^= low
+
+    def filled_count(self) -> int:
+        return (self.x | self.o).bit_count()
+
+    def is_full(self) -> bool:
+        return (self.x | self.o) == self.full
+
+    def wins_at(self, index: int, symbol: str) -> bool:
+        """آیا symbol با خطی که از خانه index می‌گذرد برنده است؟ (حداکثر چهار مقایسه)"""
+        bits = self.x if symbol == 'X' else self.o
+        for line in self.cell_masks[index]:
+            if bits & line == line:
+                return True
+        return False
+
+    def has_won(self, symbol: str) -> bool:
+        bits = self.x if symbol == 'X' else self.o
+        for line in self.lines:
+            if bits & line == line:
+                return True
+        return False
+
+    def winning_line(self, symbol: str) -> Optional[List[Tuple[int, int]]]:
+        """خانه‌های خط برنده symbol یا None"""
+        bits = self.x if symbol == 'X' else self.o
+        for cells, line in zip(line_cells(self.size), self.lines):
+            if bits & line == line:
+                return [divmod(cell, self.size) for cell in cells]
+        return None
+
+    def evaluate(self, player: str) -> int:
+        """ارزیابی کل صفحه از دید player: ‎+100/−100 برای خط کامل و ‎+10/−10 برای یک حرکت تا کامل
+
+        تنها پیاده‌سازی اسکالر این قواعد؛ evaluator.py نسخه برداری همین قواعد است
+        """
+        mine, theirs = (self.x, self.o) if player == 'X' else (self.o, self.x)
+        n = self.size
+        score = 0
+        for line in self.lines:
+            player_count = (mine & line).bit_count()
+            opponent_count = (theirs & line).bit_count()
+            if player_count == n:
+                score += 100
+            elif opponent_count == n:
+                score -= 100
+            elif player_count + opponent_count == n - 1:
+                if player_count == n - 1:
+                    score += 10
+                elif opponent_count == n - 1:
+                    score -= 10
+        return score
+
+    def __getitem__(self, row: int) -> _RowView:
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        return _RowView(self, row)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[_RowView]:
+        for row in range(self.size):
+            yield _RowView(self, row)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BitBoard):
+            return self.size == other.size and self.x == other.x and self.o == other.o
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.size, self.x, self.o))
+
+    def __repr__(self) -> str:
+        return f"BitBoard({self.to_list()!r})"
+
+
+def as_bitboard(board) -> BitBoard:
+    """برگرداندن همان BitBoard یا تبدیل صفحه لیستی به BitBoard"""
+    if isinstance(board, BitBoard):
+        return board
+    return BitBoard.from_list(board)
+
+
+def as_list(board) -> List[List[str]]:
+    """برگرداندن همان صفحه لیستی یا تبدیل BitBoard به لیست تو در تو"""
+    if isinstance(board, BitBoard):
+        return board.to_list()
+    return board
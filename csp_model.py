@@ -0,0 +1,130 @@
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from bitboard import BitBoard, as_bitboard, line_cells, line_names
+
+
+Cell = Tuple[int, int]
+
+
+@lru_cache(maxsize=None)
+def csp_structure(size: int):
+    """ساختار ثابت CSP برای هر ابعاد: محدودیت‌ها، اندیس خانه به محدودیت و جدول همسایه‌ها"""
+    constraints = {}
+    cell_constraints = {}
+    for name, cells in zip(line_names(size), line_cells(size)):
+        constraints[name] = tuple(divmod(cell, size) for cell in cells)
+        for cell in constraints[name]:
+            cell_constraints.setdefault(cell, []).append(name)
+    cell_constraints = {cell: tuple(names) for cell, names in cell_constraints.items()}
+
+    # همسایه‌ها: خانه‌هایی که حداقل در یک خط با خانه مشترک‌اند (به ترتیب خطوط، بدون تکرار)
+    neighbors = {}
+    for cell, names in cell_constraints.items():
+        seen = {cell}
+        ordered = []
+        for name in names:
+            for other in constraints[name]:
+                if other not in seen:
+                    seen.add(other)
+                    ordered.append(other)
+        neighbors[cell] = tuple(ordered)
+    return constraints, cell_constraints, neighbors
+
+
+
+def uniform_value(counts: Dict[str, int]) -> Optional[str]:
+    """اگر همه خانه‌های پر یک خط (شمارنده‌های X/O آن) یک نماد دارند آن نماد، وگرنه None"""
+    if counts['X'] and not counts['O']:
+        return 'X'
+    if counts['O'] and not counts['X']:
+        return 'O'
+    return None
+
+class CSPModel:
+    """مدل CSP پایدار بازی که با هر حرکت به صورت افزایشی به‌روز می‌شود"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.board = BitBoard(size)  # تصویر صفحه‌ای که مدل با آن همگام است
+
+        # محدودیت‌ها: ردیف‌ها، ستون‌ها و دو قطر (همان کلیدهای initialize_csp)
+        constraints, cell_constraints, neighbors = csp_structure(size)
+        self.constraints: Dict[str, Tuple[Cell, ...]] = dict(constraints)
+        self.cell_constraints: Dict[Cell, Tuple[str, ...]] = cell_constraints
+        self.neighbors: Dict[Cell, Tuple[Cell, ...]] = neighbors
+
+        # شمارنده X/O/خالی هر محدودیت
+        self.counts: Dict[str, Dict[str, int]] = {
+            name: {'X': 0, 'O': 0, '': size} for name in self.constraints
+        }
+        self.domains: Dict[Cell, Set[str]] = {
+            (i, j): {'X', 'O'} for i in range(size) for j in range(size)
+        }
+        # حذف‌هایی که الگوریتم‌ها از دامنه‌ها انجام داده‌اند تا بعداً برگردانده شوند
+        self.trail: List[Tuple[Cell, str]] = []
+        # تابعی که با هر تغییر دامنه یک خانه صدا زده می‌شود (مثلاً صف اولویت MRV)
+        self.listener: Optional[Callable[[Cell], None]] = None
+        # تعداد کل حذف‌ها از دامنه‌ها (شمارنده ابزارسنجی؛ با undo کم نمی‌شود)
+        self.prunings = 0
+
+    def value(self, cell: Cell) -> str:
+        return self.board.get(*cell)
+
+    def assign(self, cell: Cell, symbol: str):
+        """مقداردهی یک خانه؛ فقط محدودیت‌های گذرنده از آن خانه به‌روز می‌شوند"""
+        previous = self.board.get(*cell)
+        if previous == symbol:
+            return
+        self.restore()
+        self.board.set(cell[0], cell[1], symbol)
+        for name in self.cell_constraints[cell]:
+            counts = self.counts[name]
+            counts[previous] -= 1
+            counts[symbol] += 1
+        self.domains[cell] = {symbol} if symbol else {'X', 'O'}
+
+    def clear(self, cell: Cell):
+        """خالی کردن یک خانه"""
+        self.assign(cell, '')
+
+    def sync(self, board):
+        """همگام‌سازی با صفحه داده‌شده؛ فقط خانه‌های تغییرکرده پردازش می‌شوند"""
+        board = as_bitboard(board)
+        changed = (board.x ^ self.board.x) | (board.o ^ self.board.o)
+        while changed:
+            low = changed & -changed
+            index = low.bit_length() - 1
+            cell = divmod(index, self.size)
+            self.assign(cell, board.get(*cell))
+            changed ^= low
+
+    def prune(self, cell: Cell, value: str) -> bool:
+        """حذف value از دامنه cell با ثبت در trail؛ True اگر دامنه خالی شود"""
+        domain = self.domains[cell]
+        if value in domain:
+            domain.remove(value)
+            self.trail.append((cell, value))
+            self.prunings += 1
+            if self.listener is not None:
+                self.listener(cell)
+        return not domain
+
+    def mark(self) -> int:
+        """نقطه بازگشت فعلی trail"""
+        return len(self.trail)
+
+    def undo(self, mark: int):
+        """برگرداندن حذف‌های انجام‌شده پس از mark (به ترتیب معکوس)"""
+        trail = self.trail
+        domains = self.domains
+        listener = self.listener
+        while len(trail) > mark:
+            cell, value = trail.pop()
+            domains[cell].add(value)
+            if listener is not None:
+                listener(cell)
+
+    def restore(self):
+        """برگرداندن همه حذف‌های ثبت‌شده در trail"""
+        self.undo(0)
@@ -0,0 +1,89 @@
+from typing import Tuple
+
+import numpy as np
+
+from bitboard import BitBoard
+
+EMPTY, X_CELL, O_CELL = 0, 1, -1  # مقدار خانه‌ها در آرایه int8
+
+
+def _bit_array(mask: int, cells: int) -> np.ndarray:
+    raw = np.frombuffer(mask.to_bytes((cells + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little')[:cells].astype(np.int8)
+
+
+def to_array(board) -> np.ndarray:
+    """تبدیل صفحه (BitBoard، لیستی یا آرایه) به آرایه int8 با X=1، O=-1 و خالی=0"""
+    if isinstance(board, np.ndarray):
+        return board.astype(np.int8, copy=False)
+    if isinstance(board, BitBoard):
+        n = board.size
+        return (_bit_array(board.x, n * n) - _bit_array(board.o, n * n)).reshape(n, n)
+    return np.array([[X_CELL if v == 'X' else O_CELL if v == 'O' else EMPTY for v in row]
+                     for row in board], dtype=np.int8)
+
+
+def to_bitboard(board: np.ndarray) -> BitBoard:
+    """تبدیل آرایه int8 (X=1، O=-1) به BitBoard"""
+    flat = np.asarray(board).reshape(-1)
+    n = int(round(len(flat) ** 0.5))
+    x = int.from_bytes(np.packbits(flat == X_CELL, bitorder='little').tobytes(), 'little')
+    o = int.from_bytes(np.packbits(flat == O_CELL, bitorder='little').tobytes(), 'little')
+    return BitBoard(n, x, o)
+
+
+def line_counts(boards: np.ndarray, value: int) -> np.ndarray:
+    """تعداد خانه‌های value در هر خط؛ شکل (..., 2N+2) به ترتیب ردیف‌ها، ستون‌ها، قطر اصلی، قطر فرعی"""
+    marks = boards == value
+    return np.concatenate([
+        marks.sum(axis=-1, dtype=np.int16),
+        marks.sum(axis=-2, dtype=np.int16),
+        np.trace(marks, axis1=-2, axis2=-1, dtype=np.int16)[..., None],
+        # معادل fliplr().trace برای آرایه‌های دسته‌ای (برگرداندن محور ستون‌ها)
+        np.trace(marks[..., ::-1], axis1=-2, axis2=-1, dtype=np.int16)[..., None],
+    ], axis=-1)
+
+
+def _line_scores(mine: np.ndarray, theirs: np.ndarray, n: int) -> np.ndarray:
+    """همان قواعد BitBoard.evaluate: ‎+100/−100 برای خط کامل و ‎+10/−10 برای یک حرکت تا کامل"""
+    empty = n - mine - theirs
+    return np.select(
+        [mine == n, theirs == n, (mine == n - 1) & (empty == 1), (theirs == n - 1) & (empty == 1)],
+        [100, -100, 10, -10],
+        default=0,
+    )
+
+
+def evaluate_batch(boards: np.ndarray, player: str) -> np.ndarray:
+    """امتیاز k صفحه با شکل (k, N, N) از دید player در یک گذر"""
+    n = boards.shape[-1]
+    x_counts = line_counts(boards, X_CELL)
+    o_counts = line_counts(boards, O_CELL)
+    mine, theirs = (x_counts, o_counts) if player == 'X' else (o_counts, x_counts)
+    return _line_scores(mine, theirs, n).sum(axis=-1)
+
+
+def evaluate(board, player: str) -> int:
+    """امتیاز یک صفحه از دید player (معادل BitBoard.evaluate)"""
+    return int(evaluate_batch(to_array(board)[None], player)[0])
+
+
+def children(board: np.ndarray, player: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(اندیس خطی خانه‌های خالی، آرایه (k, N, N) صفحه‌های فرزند پس از حرکت player)"""
+    n = board.shape[-1]
+    flat = board.reshape(-1)
+    empties = np.flatnonzero(flat == EMPTY)
+    boards = np.repeat(flat[None, :], len(empties), axis=0)
+    boards[np.arange(len(empties)), empties] = X_CELL if player == 'X' else O_CELL
+    return empties, boards.reshape(-1, n, n)
+
+
+def evaluate_children(board, player: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ارزیابی دسته‌ای همه حرکات player: (اندیس‌ها، امتیاز از دید player، آیا حرکت برنده است)"""
+    indices, boards = children(to_array(board), player)
+    n = boards.shape[-1]
+    mine = line_counts(boards, X_CELL if player == 'X' else O_CELL)
+    theirs = line_counts(boards, O_CELL if player == 'X' else X_CELL)
+    scores = _line_scores(mine, theirs, n).sum(axis=-1)
+    wins = (mine == n).any(axis=-1)
+    return indices, scores, wins
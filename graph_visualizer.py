@@ -1,68 +1,291 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import tkinter as tk
+from collections import deque
+from itertools import combinations
+from typing import Dict, Hashable, List, Optional, Set, Tuple
 
-class GraphVisualizer:
-    def __init__(self):
-        self.G = nx.Graph()
+from bitboard import as_bitboard, line_cells
+
+# matplotlib، networkx و tkinter فقط هنگام رسم بارگذاری می‌شوند تا موتور بدون آن‌ها اجرا شود
+
+TREE_NODE_BUDGET = 200  # حداکثر گره‌های باز درخت پیش از جمع شدن زیردرخت‌ها
+LABEL_LIMIT = 60        # با گره‌های بیشتر برچسب‌ها رسم نمی‌شوند
+
+
+class FigureWindow:
+    """پنجره Toplevel با یک Figure و FigureCanvasTkAgg ماندگار که هر بار در جا دوباره رسم می‌شود
+
+    Figure مستقیم (نه از pyplot) ساخته می‌شود تا در فهرست سراسری pyplot نماند و با بستن پنجره آزاد شود
+    """
+
+    def __init__(self, title: str, geometry: str, figsize: Tuple[int, int], note: Optional[str] = None):
+        self.title = title
+        self.geometry = geometry
+        self.figsize = figsize
+        self.note = note
+        self.window = None
         self.fig = None
+        self.ax = None
         self.canvas = None
 
+    def is_open(self) -> bool:
+        return self.window is not None and bool(self.window.winfo_exists())
+
+    def open(self, parent) -> bool:
+        """ساخت پنجره در صورت نیاز؛ True اگر پنجره تازه ساخته شد"""
+        if self.is_open():
+            self.window.lift()
+            return False
+        import tkinter as tk
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(self.title)
+        self.window.geometry(self.geometry)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.fig = Figure(figsize=self.figsize)
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        if self.note:
+            tk.Label(self.window, text=self.note, font=("B Nazanin", 10), pady=10).pack()
+        return True
+
+    def close(self):
+        if self.is_open():
+            self.window.destroy()
+        self.window = self.fig = self.ax = self.canvas = None
+
+    def redraw(self):
+        self.canvas.draw_idle()
+
+
+def _spanning_tree(graph) -> Tuple[List[Hashable], Dict[Hashable, List[Hashable]], List[Hashable]]:
+    """درخت پوشای BFS (ریشه‌ها، فرزندان، ترتیب BFS)؛ وضعیت تکراری زیر اولین والدش می‌ماند"""
+    children: Dict[Hashable, List[Hashable]] = {}
+    roots: List[Hashable] = []
+    order: List[Hashable] = []
+    # گره‌هایی که از هیچ ریشه‌ای در دسترس نیستند (چرخه) خودشان ریشه می‌شوند
+    starts = [node for node, degree in graph.in_degree() if degree == 0] + list(graph)
+    for start in starts:
+        if start in children:
+            continue
+        roots.append(start)
+        children[start] = []
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in graph.successors(node):
+                if child not in children:
+                    children[child] = []
+                    children[node].append(child)
+                    queue.append(child)
+    return roots, children, order
+
+
+class TreeView:
+    """نمای لایه‌ای درخت بازی با سطح جزئیات: سطح‌ها تا بودجه گره باز می‌شوند و بقیه زیردرخت‌ها جمع می‌مانند
+
+    کلیک روی گره جمع‌شده آن را باز و روی گره باز آن را جمع می‌کند؛ چیدمان فقط برای گره‌های دیده‌شده و
+    در O(گره‌های دیده‌شده) محاسبه می‌شود
+    """
+
+    def __init__(self, graph, budget: int = TREE_NODE_BUDGET):
+        self.budget = budget
+        self.view = FigureWindow("درخت بازی", "900x650", (12, 8),
+                                 "گره‌های نارنجی جمع شده‌اند؛ برای باز یا جمع کردن روی گره کلیک کنید.")
+        self.set_graph(graph)
+
+    def set_graph(self, graph):
+        """جایگزینی درخت (مثلاً پس از create_game_tree)؛ پنجره و بوم همان می‌مانند"""
+        self.graph = graph
+        self.roots, self.children, order = _spanning_tree(graph)
+        self.sizes: Dict[Hashable, int] = {}  # اندازه زیردرخت هر گره در درخت پوشا
+        for node in reversed(order):
+            self.sizes[node] = 1 + sum(self.sizes[child] for child in self.children[node])
+        self.expanded: Set[Hashable] = set()
+        self.positions: Dict[Hashable, Tuple[float, float]] = {}
+        self._expand_within_budget()
+
+    def _expand_within_budget(self):
+        """باز کردن سطح به سطح تا وقتی تعداد گره‌های دیده‌شده از بودجه بیشتر نشود"""
+        visible = len(self.roots)
+        queue = deque(self.roots)
+        while queue:
+            node = queue.popleft()
+            children = self.children[node]
+            if visible + len(children) > self.budget:
+                break
+            if children:
+                self.expanded.add(node)
+                visible += len(children)
+                queue.extend(children)
+
+    def _layout(self):
+        """چیدمان لایه‌ای: برگ‌های دیده‌شده پشت سر هم و هر والد بالای میانه فرزندانش"""
+        positions = {}
+        next_x = 0
+
+        def place(node, depth):
+            nonlocal next_x
+            children = self.children[node] if node in self.expanded else []
+            if not children:
+                positions[node] = (next_x, -depth)
+                next_x += 1
+                return
+            for child in children:
+                place(child, depth + 1)
+            positions[node] = ((positions[children[0]][0] + positions[children[-1]][0]) / 2, -depth)
+
+        for root in self.roots:
+            place(root, 0)
+        self.positions = positions
+
+    def toggle(self, node):
+        if node in self.expanded:
+            # جمع کردن همه نوادگان باز تا باز کردن دوباره از همین سطح شروع شود
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                if current in self.expanded:
+                    self.expanded.discard(current)
+                    stack.extend(self.children[current])
+        elif self.children[node]:
+            self.expanded.add(node)
+
+    def draw(self):
+        from matplotlib.collections import LineCollection
+
+        self._layout()
+        ax = self.view.ax
+        ax.clear()
+        positions = self.positions
+        segments = [(positions[node], positions[child])
+                    for node in self.expanded if node in positions for child in self.children[node]]
+        ax.add_collection(LineCollection(segments, colors='gray', linewidths=1, zorder=1))
+        nodes = list(positions)
+        collapsed = [node not in self.expanded and bool(self.children[node]) for node in nodes]
+        ax.scatter([positions[node][0] for node in nodes], [positions[node][1] for node in nodes],
+                   c=['orange' if folded else 'lightblue' for folded in collapsed],
+                   s=200 if len(nodes) <= LABEL_LIMIT else 30, zorder=2)
+        if len(nodes) <= LABEL_LIMIT:
+            for node, folded in zip(nodes, collapsed):
+                label = str(self.graph.nodes[node].get('score', 0))
+                if folded:
+                    label += f"\n+{self.sizes[node] - 1}"
+                ax.annotate(label, positions[node], ha='center', va='bottom', fontsize=8,
+                            xytext=(0, 8), textcoords='offset points')
+        ax.set_title(f"درخت بازی ({len(nodes)} از {len(self.sizes)} گره)")
+        ax.set_axis_off()
+        ax.autoscale_view()
+        self.view.redraw()
+
+    def _on_click(self, event):
+        if event.inaxes is not self.view.ax or event.xdata is None or not self.positions:
+            return
+        node, (x, y) = min(self.positions.items(),
+                           key=lambda item: (item[1][0] - event.xdata) ** 2 + (item[1][1] - event.ydata) ** 2)
+        if abs(x - event.xdata) <= 0.5 and abs(y - event.ydata) <= 0.3:
+            self.toggle(node)
+            self.draw()
+
+    def show(self, parent):
+        if self.view.open(parent):
+            self.view.canvas.mpl_connect('button_press_event', self._on_click)
+        self.draw()
+
+
+def draw_game_tree(graph, parent=None, budget: Optional[int] = None,
+                   tree: Optional[TreeView] = None) -> TreeView:
+    """نمایش درخت بازی؛ بدون parent پنجره مستقل تا بسته شدن باز می‌ماند (مانند plt.show)
+
+    با tree همان نما (و پنجره باز آن) دوباره استفاده می‌شود و فقط اگر graph عوض شده باشد از نو ساخته می‌شود
+    """
+    budget = TREE_NODE_BUDGET if budget is None else budget
+    if tree is None:
+        tree = TreeView(graph, budget)
+    elif tree.graph is not graph or tree.budget != budget:
+        tree.budget = budget
+        tree.set_graph(graph)
+    if parent is not None:
+        tree.show(parent)
+        return tree
+
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.withdraw()
+    tree.show(root)
+    tree.view.window.protocol("WM_DELETE_WINDOW", lambda: (tree.view.close(), root.destroy()))
+    root.mainloop()
+    return tree
+
+
+def _node_name(size: int, index: int) -> str:
+    row, col = divmod(index, size)
+    return f"({row+1},{col+1})"
+
+
+class GraphVisualizer:
+    def __init__(self):
+        self.G = None
+        self.size = None
+        self.view = FigureWindow("گراف CSP", "600x600", (8, 8),
+                                 "گراف CSP: هر گره نشان‌دهنده یک خانه خالی است.\n"
+                                 "یال‌ها نشان‌دهنده محدودیت‌های بین خانه‌ها هستند.")
+
     def create_csp_graph(self, board, size):
-        """ایجاد گراف CSP بر اساس وضعیت فعلی بازی"""
-        self.G.clear()
-        
-        # اضافه کردن گره‌ها (خانه‌های خالی)
-        empty_cells = []
-        for i in range(size):
-            for j in range(size):
-                if board[i][j] == '':
-                    node = f"({i+1},{j+1})"
-                    empty_cells.append((i, j))
-                    self.G.add_node(node, pos=(j, -i))  # معکوس کردن i برای نمایش صحیح
-
-        # اضافه کردن یال‌ها (محدودیت‌ها)
-        for i, (r1, c1) in enumerate(empty_cells):
-            for j, (r2, c2) in enumerate(empty_cells[i+1:], i+1):
-                # اگر دو خانه در یک سطر، ستون یا قطر باشند
-                if (r1 == r2 or c1 == c2 or abs(r1-r2) == abs(c1-c2)):
-                    self.G.add_edge(f"({r1+1},{c1+1})", f"({r2+1},{c2+1})")
+        """ایجاد گراف CSP بر اساس وضعیت فعلی بازی
+
+        گره‌ها خانه‌های خالی‌اند و یال‌ها از دسته‌بندی خانه‌های خالی هر خط (همان خطوط initialize_csp)
+        ساخته می‌شوند؛ اگر فقط خانه‌هایی پر شده باشند گراف موجود به‌روز می‌شود و از نو ساخته نمی‌شود
+        """
+        board = as_bitboard(board)
+        empty = set(board.empty_indices())
+        if self.G is not None and self.size == size:
+            names = {_node_name(size, index) for index in empty}
+            if names <= set(self.G):
+                self.G.remove_nodes_from([node for node in self.G if node not in names])
+                return
+        self._build(size, empty)
+
+    def _build(self, size, empty):
+        import networkx as nx
+
+        self.G = nx.Graph()
+        self.size = size
+        # معکوس کردن ردیف برای نمایش صحیح
+        self.G.add_nodes_from((_node_name(size, index), {'pos': (index % size, -(index // size))})
+                              for index in sorted(empty))
+        # دو خانه حداکثر یک خط مشترک دارند، پس هر یال دقیقاً یک بار ساخته می‌شود
+        for cells in line_cells(size):
+            bucket = [_node_name(size, cell) for cell in cells if cell in empty]
+            self.G.add_edges_from(combinations(bucket, 2))
+
+    def remove_cell(self, row, col):
+        """به‌روزرسانی افزایشی پس از هر حرکت: خانه پرشده و یال‌هایش حذف می‌شوند"""
+        if self.G is not None:
+            node = _node_name(self.size, row * self.size + col)
+            if node in self.G:
+                self.G.remove_node(node)
 
     def show_graph(self, parent):
-        """نمایش گراف در پنجره جدید"""
-        # ایجاد پنجره جدید
-        graph_window = tk.Toplevel(parent)
-        graph_window.title("گراف CSP")
-        graph_window.geometry("600x600")
-
-        # ایجاد نمودار
-        self.fig = plt.figure(figsize=(8, 8))
-        pos = nx.get_node_attributes(self.G, 'pos')
-        
-        # رسم گراف
-        nx.draw(self.G, pos,
+        """نمایش گراف؛ پنجره و بوم آن یک بار ساخته و در کلیک‌های بعدی در جا دوباره رسم می‌شوند"""
+        import networkx as nx
+
+        self.view.open(parent)
+        ax = self.view.ax
+        ax.clear()
+        nx.draw(self.G, nx.get_node_attributes(self.G, 'pos'),
+                ax=ax,
                 with_labels=True,
                 node_color='lightblue',
                 node_size=1000,
                 font_size=10,
                 font_weight='bold',
                 edge_color='gray',
-                width=2,
-                arrows=True)
-
-        # اضافه کردن نمودار به پنجره
-        self.canvas = FigureCanvasTkAgg(self.fig, master=graph_window)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-        # اضافه کردن توضیحات
-        description = tk.Label(graph_window,
-                             text="گراف CSP: هر گره نشان‌دهنده یک خانه خالی است.\n"
-                                  "یال‌ها نشان‌دهنده محدودیت‌های بین خانه‌ها هستند.",
-                             font=("B Nazanin", 10),
-                             pady=10)
-        description.pack()
+                width=2)
+        self.view.redraw()
 
     def update_and_show(self, board, size, parent):
         """به‌روزرسانی و نمایش گراف"""
@@ -0,0 +1,48 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+# tracer(رویداد، داده‌ها)؛ رویدادها: phase_start، phase_end و progress
+Tracer = Callable[[str, Dict[str, Any]], None]
+
+# زمینه بی‌اثر مشترک برای وقتی ابزارسنجی خاموش است
+DISABLED = nullcontext()
+
+
+class AnalysisResult(NamedTuple):
+    """حرکت یک فراخوانی تحلیلگر همراه با شمارنده‌ها و زمان مراحل آن"""
+    method: str
+    move: Any
+    counters: Dict[str, int]
+    phases: Dict[str, float]  # ثانیه صرف‌شده در هر مرحله
+    seconds: float
+
+
+class Instrumentation:
+    """زمان‌سنج مراحل یک فراخوانی، با tracer اختیاری برای پیشرفت زنده
+
+    شمارنده‌ها از آمارهای خود الگوریتم‌ها در GameAnalyzer.analyze جمع می‌شوند
+    """
+
+    def __init__(self, tracer: Optional[Tracer] = None):
+        self.tracer = tracer
+        self.phases: Dict[str, float] = {}
+
+    def reset(self):
+        self.phases = {}
+
+    def trace(self, event: str, **data):
+        if self.tracer is not None:
+            self.tracer(event, data)
+
+    @contextmanager
+    def phase(self, name: str):
+        """زمان‌سنجی یک مرحله؛ زمان مراحل هم‌نام جمع می‌شود"""
+        self.trace('phase_start', phase=name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            self.trace('phase_end', phase=name, seconds=elapsed)
@@ -0,0 +1,57 @@
+from itertools import combinations, product
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+from csp_model import Cell, CSPModel
+
+
+class KConsistencyStats(NamedTuple):
+    """آمار اجرای k-سازگاری"""
+    subsets: int     # تعداد زیرمجموعه‌های k تایی بررسی‌شده
+    checks: int      # تعداد تخصیص‌های (k-1) تایی آزموده‌شده
+    truncated: bool  # بررسی با رسیدن به سقف کار نیمه‌تمام ماند
+
+
+class KConsistency:
+    """k-سازگاری روی مدل CSP؛ فقط زیرمجموعه‌های درون یک خط بررسی می‌شوند (بقیه محدودیت مشترکی ندارند)
+
+    هر تخصیص سازگار به k-1 متغیر زیرمجموعه باید به متغیر باقی‌مانده قابل گسترش باشد
+    """
+
+    def __init__(self, model: CSPModel, k: int = 2, max_checks: Optional[int] = None):
+        if k < 1:
+            raise ValueError(f"k نامعتبر: {k}")
+        self.model = model
+        self.k = k
+        self.max_checks = max_checks  # سقف تخصیص‌های آزموده‌شده (None = بدون سقف)
+
+    def subsets(self) -> Iterator[Tuple[Cell, ...]]:
+        """زیرمجموعه‌های k تایی خانه‌های خالی هر خط؛ دو خانه حداکثر یک خط مشترک دارند پس تکراری نیست"""
+        model = self.model
+        if self.k == 1:
+            for cell in model.domains:
+                if model.value(cell) == '':
+                    yield (cell,)
+            return
+        for constraint in model.constraints.values():
+            empty = [cell for cell in constraint if model.value(cell) == '']
+            yield from combinations(empty, self.k)
+
+    def run(self) -> Tuple[bool, KConsistencyStats]:
+        """False با اولین زیرمجموعه ناسازگار؛ با رسیدن به سقف کار True (ناسازگاری اثبات نشد)"""
+        domains = self.model.domains
+        subsets = 0
+        checks = 0
+        for subset in self.subsets():
+            subsets += 1
+            for position, target in enumerate(subset):
+                others = subset[:position] + subset[position + 1:]
+                for values in product(*(domains[cell] for cell in others)):
+                    checks += 1
+                    if self.max_checks is not None and checks > self.max_checks:
+                        return True, KConsistencyStats(subsets, checks - 1, True)
+                    # همه خانه‌های یک خط همسایه‌اند: مقادیر باید دوبه‌دو متفاوت باشند
+                    if len(set(values)) < len(values):
+                        continue
+                    if not any(value not in values for value in domains[target]):
+                        return False, KConsistencyStats(subsets, checks, False)
+        return True, KConsistencyStats(subsets, checks, False)
@@ -0,0 +1,152 @@
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from bitboard import cell_lines, line_cells
+from csp_model import Cell, CSPModel
+
+
+class MinConflictsStats(NamedTuple):
+    """آمار جستجوی محلی کمترین تعارض"""
+    steps: int               # تعداد گام‌های اجراشده
+    restarts: int            # تعداد شروع‌های دوباره تصادفی
+    conflicts: int           # کمترین تعداد جفت خانه هم‌مقدار هم‌خط دیده‌شده
+    steps_per_second: float
+
+
+class MinConflicts:
+    """کمترین تعارض با شمارنده X/O افزایشی هر خط و مجموعه متغیرهای تعارض‌دار با نمونه‌برداری O(1)
+
+    هر تغییر مقدار فقط خطوط گذرنده از همان خانه را به‌روز می‌کند؛ تعارض یعنی همسایه هم‌خط با همان مقدار
+    """
+
+    def __init__(self, model: CSPModel, tabu_tenure: int = 0, restart_after: Optional[int] = None,
+                 rng: Optional[random.Random] = None):
+        self.model = model
+        self.size = model.size
+        self.lines = cell_lines(model.size)
+        self.cells = line_cells(model.size)
+        self.tabu_tenure = tabu_tenure      # گام‌هایی که خانه تغییرکرده دوباره انتخاب نمی‌شود
+        self.restart_after = restart_after  # شروع دوباره پس از این تعداد گام بدون بهبود (None = هرگز)
+        self.rng = rng or random.Random()
+
+        board = model.board
+        self.fixed = [board.get(*divmod(index, self.size)) for index in range(self.size * self.size)]
+        self.variables = list(board.empty_indices())
+        self.is_variable = [False] * len(self.fixed)
+        for index in self.variables:
+            self.is_variable[index] = True
+        self.domains = {index: sorted(model.domains[divmod(index, self.size)]) for index in self.variables}
+
+    def _initialize(self):
+        """تخصیص تصادفی تازه و ساخت شمارنده‌ها و مجموعه تعارض‌ها"""
+        rng = self.rng
+        self.value = list(self.fixed)
+        for index in self.variables:
+            self.value[index] = rng.choice(self.domains[index])
+        self.counts = {'X': [0] * len(self.cells), 'O': [0] * len(self.cells)}
+        for line, cells in enumerate(self.cells):
+            for cell in cells:
+                if self.value[cell]:
+                    self.counts[self.value[cell]][line] += 1
+        # تعداد جفت‌های هم‌مقدار در هر خط (هر دو خانه حداکثر یک خط مشترک دارند)
+        self.total = sum(c * (c - 1) // 2 for counts in self.counts.values() for c in counts)
+        self._conflicted: List[int] = []
+        self._position: Dict[int, int] = {}
+        for index in self.variables:
+            if self.conflicts(index, self.value[index]):
+                self._add(index)
+
+    def conflicts(self, index: int, value: str) -> int:
+        """تعداد همسایه‌های هم‌مقدار اگر خانه index مقدار value بگیرد"""
+        counts = self.counts[value]
+        total = 0
+        for line in self.lines[index]:
+            total += counts[line]
+        if self.value[index] == value:
+            total -= len(self.lines[index])
+        return total
+
+    def _add(self, index: int):
+        if index not in self._position:
+            self._position[index] = len(self._conflicted)
+            self._conflicted.append(index)
+
+    def _remove(self, index: int):
+        position = self._position.pop(index)
+        last = self._conflicted.pop()
+        if last != index:
+            self._conflicted[position] = last
+            self._position[last] = position
+
+    def _sample(self) -> Optional[int]:
+        """متغیر تعارض‌دار تصادفی؛ اعضای کهنه مجموعه هنگام نمونه‌برداری حذف می‌شوند"""
+        conflicted = self._conflicted
+        while conflicted:
+            index = conflicted[self.rng.randrange(len(conflicted))]
+            if self.conflicts(index, self.value[index]):
+                return index
+            self._remove(index)
+        return None
+
+    def _flip(self, index: int, new: str):
+        old = self.value[index]
+        self.value[index] = new
+        old_counts = self.counts[old]
+        new_counts = self.counts[new]
+        for line in self.lines[index]:
+            old_counts[line] -= 1
+            self.total -= old_counts[line]
+            self.total += new_counts[line]
+            new_counts[line] += 1
+            if new_counts[line] == 2:
+                # خانه دیگر این خط با همان مقدار تازه تعارض‌دار شده است
+                for cell in self.cells[line]:
+                    if cell != index and self.is_variable[cell] and self.value[cell] == new:
+                        self._add(cell)
+        if self.conflicts(index, new):
+            self._add(index)
+
+    def run(self, max_steps: int) -> Tuple[Optional[Dict[Cell, str]], MinConflictsStats]:
+        """جستجو تا max_steps گام؛ (تخصیص بدون تعارض یا None، آمار)"""
+        rng = self.rng
+        start = time.perf_counter()
+        self._initialize()
+        best = self.total
+        since_best = 0
+        restarts = 0
+        tabu_until = [0] * len(self.fixed)
+        solution = None
+        step = 0
+        while step < max_steps:
+            var = self._sample()
+            if var is None:
+                solution = {divmod(index, self.size): self.value[index] for index in self.variables}
+                break
+            if tabu_until[var] > step:
+                # یک نمونه دیگر؛ اگر آن هم ممنوع بود همین متغیر پذیرفته می‌شود
+                other = self._sample()
+                if other is not None and tabu_until[other] <= step:
+                    var = other
+            step += 1
+
+            scores = [(self.conflicts(var, value), value) for value in self.domains[var]]
+            least = min(score for score, _ in scores)
+            value = rng.choice([value for score, value in scores if score == least])
+            if value != self.value[var]:
+                self._flip(var, value)
+                tabu_until[var] = step + self.tabu_tenure
+
+            if self.total < best:
+                best = self.total
+                since_best = 0
+            else:
+                since_best += 1
+                if self.restart_after is not None and since_best >= self.restart_after:
+                    self._initialize()
+                    tabu_until = [0] * len(self.fixed)
+                    restarts += 1
+                    since_best = 0
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        return solution, MinConflictsStats(step, restarts, best, step / elapsed)
@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox, font
-import random
 from algorithms import GameAnalyzer
+from background import BackgroundRunner
+from bitboard import BitBoard
+from mcts import MIN_SIZE as MCTS_MIN_SIZE
 from graph_visualizer import GraphVisualizer
+from parallel import default_workers
 
 class TicTacToe:
     def __init__(self, root):
@@ -20,8 +23,14 @@ class TicTacToe:
         self.board = []
         self.player_symbol = 'X'
         self.bot_symbol = 'O'
+        self.bot_time_limit = 0.5  # ثانیه
+        self.bot_workers = default_workers()  # فقط برای صفحه‌های ۵×۵ و بزرگ‌تر
         self.analyzer = GameAnalyzer()
         self.graph_visualizer = GraphVisualizer()
+        # تحلیلگر فقط از رشته پس‌زمینه صدا زده می‌شود تا رابط کاربری قفل نشود
+        self.runner = BackgroundRunner(self.root)
+        self.bot_job = None
+        self.bot_after = None
 
         # رنگ‌های بازی
         self.colors = {
@@ -50,6 +59,17 @@ class TicTacToe:
         )
         title_label.grid(row=99, column=0, columnspan=3)
 
+        # نمایش پیشرفت جستجو (گره‌ها و عمق)
+        self.status = tk.StringVar()
+        status_label = tk.Label(
+            self.root,
+            textvariable=self.status,
+            font=self.button_font,
+            bg=self.colors['bg'],
+            fg=self.colors['title']
+        )
+        status_label.grid(row=98, column=0, columnspan=3)
+
         # دکمه شروع مجدد
         reset_btn = tk.Button(
             self.root,
@@ -102,7 +122,17 @@ class TicTacToe:
             )
             btn.grid(row=101 + row, column=col, padx=10, pady=5)
 
+    def cancel_pending(self):
+        """لغو حرکت ربات و تحلیل‌های در جریان"""
+        if self.bot_after is not None:
+            self.root.after_cancel(self.bot_after)
+            self.bot_after = None
+        self.runner.cancel()
+        self.bot_job = None
+        self.status.set('')
+
     def start_new_game(self):
+        self.cancel_pending()
         for widget in self.root.winfo_children():
             if isinstance(widget, tk.Button) and widget['text'] not in ['شروع دوباره'] + [text for text, _ in [
                 ("جستجوی پس‌گرد", None),
@@ -122,7 +152,11 @@ class TicTacToe:
             return
 
         self.buttons = []
-        self.board = [['' for _ in range(self.size)] for _ in range(self.size)]
+        self.board = BitBoard(self.size)
+        size = self.size
+        workers = self.search_workers()
+        # فرایندهای Lazy-SMP و جدول مشترکشان یک بار برای کل بازی ساخته می‌شوند، نه در هر حرکت
+        self.runner.submit(lambda job: self.analyzer.new_game(size, workers), cancellable=False)
 
         # ایجاد فریم برای صفحه بازی
         game_frame = tk.Frame(self.root, bg=self.colors['bg'], padx=20, pady=20)
@@ -148,7 +182,11 @@ class TicTacToe:
             self.buttons.append(button_row)
 
     def player_move(self, row, col):
-        if self.board[row][col] == '':
+        # تا پایان فکر کردن ربات نوبت بازیکن نیست
+        if self.bot_job is not None or self.bot_after is not None:
+            return
+        if self.board.get(row, col) == '':
+            self.cancel_pending()
             self.set_cell(row, col, self.player_symbol)
             if self.check_winner(self.player_symbol):
                 self.highlight_winner(self.player_symbol)
@@ -157,10 +195,56 @@ class TicTacToe:
             elif self.is_full():
                 messagebox.showinfo("مساوی", "بازی مساوی شد.")
                 return
-            self.root.after(500, self.bot_move)
+            self.bot_after = self.root.after(500, self.bot_move)
+
+    def search_workers(self):
+        """تعداد کارگرهای جستجوی آلفا-بتا ربات؛ صفحه‌های کوچک تک‌فرایندی و بزرگ‌ها با MCTS"""
+        if 5 <= self.size < MCTS_MIN_SIZE:
+            return self.bot_workers
+        return 1
+
+    def close(self):
+        """بستن فرایندهای جستجو از رشته تحلیلگر و سپس پنجره"""
+        self.cancel_pending()
+        self.runner.submit(lambda job: self.analyzer.close(), lambda _: self.root.destroy(), cancellable=False)
 
     def bot_move(self):
-        row, col = self.find_best_move()
+        self.bot_after = None
+        # برد فوری، سد اجباری و تهدید دوگانه رو تحلیلگر از شمارنده‌های خطوط پیش از هر جستجو پیدا می‌کنه؛
+        # بقیه حرکت‌ها با جستجوی آلفا-بتا (و جدول جابجایی مشترک بین حرکت‌ها) در پس‌زمینه انتخاب می‌شن و
+        # روی صفحه‌های بزرگ کارگرهای Lazy-SMP تا پایان مهلت با هم جستجو می‌کنن
+        board = self.board.copy()
+        workers = self.search_workers()
+
+        # روی صفحه‌های خیلی بزرگ آلفا-بتا عمق کافی نمی‌گیره؛ MCTS درختش رو بین حرکت‌ها نگه می‌داره
+        if self.size >= MCTS_MIN_SIZE:
+            def search(job):
+                return self.analyzer.mcts_search(
+                    board, self.bot_symbol, time_limit=self.bot_time_limit, stop=job.stop,
+                    progress=lambda playouts, rate: self.runner.report(job, playouts, rate)).move
+
+            self.status.set("ربات در حال فکر کردن...")
+            self.bot_job = self.runner.submit(search, self.finish_bot_move, self.show_mcts_progress)
+            return
+
+        def search(job):
+            return self.analyzer.suggest_move(
+                board, self.bot_symbol, time_limit=self.bot_time_limit, workers=workers,
+                stop=job.stop, progress=lambda nodes, depth: self.runner.report(job, nodes, depth))
+
+        self.status.set("ربات در حال فکر کردن...")
+        self.bot_job = self.runner.submit(search, self.finish_bot_move, self.show_progress)
+
+    def show_progress(self, nodes, depth):
+        self.status.set(f"عمق {depth} — {nodes} گره")
+
+    def show_mcts_progress(self, playouts, rate):
+        self.status.set(f"{playouts} شبیه‌سازی — {rate:.0f} در ثانیه")
+
+    def finish_bot_move(self, move):
+        self.bot_job = None
+        self.status.set('')
+        row, col = move if move else (None, None)
         if row is not None:
             self.set_cell(row, col, self.bot_symbol)
             if self.check_winner(self.bot_symbol):
@@ -170,7 +254,9 @@ class TicTacToe:
                 messagebox.showinfo("مساوی", "بازی مساوی شد.")
 
     def set_cell(self, row, col, symbol):
-        self.board[row][col] = symbol
+        self.board.set(row, col, symbol)
+        self.graph_visualizer.remove_cell(row, col)
+        self.runner.submit(lambda job: self.analyzer.set_cell(row, col, symbol), cancellable=False)
         self.buttons[row][col]['text'] = symbol
         if symbol == self.player_symbol:
             self.buttons[row][col]['fg'] = '#e74c3c'  # رنگ قرمز برای X
@@ -178,21 +264,10 @@ class TicTacToe:
             self.buttons[row][col]['fg'] = '#2ecc71'  # رنگ سبز برای O
 
     def is_full(self):
-        return all(self.board[r][c] != '' for r in range(self.size) for c in range(self.size))
+        return self.board.is_full()
 
     def check_winner(self, symbol):
-        for i in range(self.size):
-            if all(self.board[i][j] == symbol for j in range(self.size)):
-                return [(i, j) for j in range(self.size)]
-            if all(self.board[j][i] == symbol for j in range(self.size)):
-                return [(j, i) for j in range(self.size)]
-
-        if all(self.board[i][i] == symbol for i in range(self.size)):
-            return [(i, i) for i in range(self.size)]
-        if all(self.board[i][self.size - 1 - i] == symbol for i in range(self.size)):
-            return [(i, self.size - 1 - i) for i in range(self.size)]
-
-        return None
+        return self.board.winning_line(symbol)
 
     def highlight_winner(self, symbol):
         win_cells = self.check_winner(symbol)
@@ -200,111 +275,59 @@ class TicTacToe:
             for r, c in win_cells:
                 self.buttons[r][c].config(bg=self.colors['win'])
 
-    def find_best_move(self):
-        # اول سعی کنه خودش ببره
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == '':
-                    self.board[r][c] = self.bot_symbol
-                    if self.check_winner(self.bot_symbol):
-                        self.board[r][c] = ''
-                        return r, c
-                    self.board[r][c] = ''
-
-        # بعد سعی کنه جلوی برد بازیکن رو بگیره
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == '':
-                    self.board[r][c] = self.player_symbol
-                    if self.check_winner(self.player_symbol):
-                        self.board[r][c] = ''
-                        return r, c
-                    self.board[r][c] = ''
-
-        # در نهایت یه خونه خالی تصادفی انتخاب کنه
-        empty = [(r, c) for r in range(self.size) for c in range(self.size) if self.board[r][c] == '']
-        return random.choice(empty) if empty else (None, None)
+    def run_analysis(self, title, method):
+        """اجرای یک الگوریتم تحلیلگر در پس‌زمینه و نمایش نتیجه روی رشته Tk"""
+        if self.bot_job is not None:
+            return
+        self.runner.cancel()
+        board = self.board.copy()
+        size = self.size
+
+        def done(move):
+            self.status.set('')
+            if move:
+                row, col = move
+                messagebox.showinfo(title, 
+                                  f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
+                self.graph_visualizer.update_and_show(self.board, self.size, self.root)
+            else:
+                messagebox.showinfo(title, "هیچ حرکت مناسبی یافت نشد.")
+
+        self.status.set(f"در حال اجرای {title}...")
+        self.runner.submit(lambda job: method(board, size), done)
 
     def show_backtracking(self):
         """نمایش نتیجه الگوریتم جستجوی پس‌گرد"""
-        move = self.analyzer.backtracking_search(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("جستجوی پس‌گرد", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("جستجوی پس‌گرد", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("جستجوی پس‌گرد", self.analyzer.backtracking_search)
 
     def show_degree_heuristic(self):
         """نمایش نتیجه الگوریتم هیوریستیک درجه"""
-        move = self.analyzer.degree_heuristic(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("هیوریستیک درجه", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("هیوریستیک درجه", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("هیوریستیک درجه", self.analyzer.degree_heuristic)
 
     def show_forward_checking(self):
         """نمایش نتیجه الگوریتم بررسی رو به جلو"""
-        move = self.analyzer.forward_checking(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("بررسی رو به جلو", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("بررسی رو به جلو", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("بررسی رو به جلو", self.analyzer.forward_checking)
 
     def show_constraint_propagation(self):
         """نمایش نتیجه الگوریتم انتشار محدودیت"""
-        move = self.analyzer.constraint_propagation(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("انتشار محدودیت", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("انتشار محدودیت", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("انتشار محدودیت", self.analyzer.constraint_propagation)
 
     def show_arc_consistency(self):
         """نمایش نتیجه الگوریتم سازگاری قوس"""
-        move = self.analyzer.arc_consistency(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("سازگاری قوس", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("سازگاری قوس", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("سازگاری قوس", self.analyzer.arc_consistency)
 
     def show_k_consistency(self):
         """نمایش نتیجه الگوریتم k-سازگاری"""
-        move = self.analyzer.k_consistency(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("k-سازگاری", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("k-سازگاری", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("k-سازگاری", self.analyzer.k_consistency)
 
     def show_min_conflicts(self):
         """نمایش نتیجه الگوریتم کمترین تعارض"""
-        move = self.analyzer.min_conflicts(self.board, self.size)
-        if move:
-            row, col = move
-            messagebox.showinfo("کمترین تعارض", 
-                              f"پیشنهاد می‌شود در خانه ({row+1}, {col+1}) قرار دهید.")
-            self.graph_visualizer.update_and_show(self.board, self.size, self.root)
-        else:
-            messagebox.showinfo("کمترین تعارض", "هیچ حرکت مناسبی یافت نشد.")
+        self.run_analysis("کمترین تعارض", self.analyzer.min_conflicts)
 
 
 # اجرای برنامه
 if __name__ == "__main__":
     root = tk.Tk()
     game = TicTacToe(root)
+    root.protocol("WM_DELETE_WINDOW", game.close)
     root.mainloop()
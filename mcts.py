@@ -0,0 +1,252 @@
+import math
+import random
+import time
+from array import array
+from collections import deque
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from bitboard import BitBoard, as_bitboard
+
+DEFAULT_EXPLORATION = math.sqrt(2)
+DEFAULT_TIME_LIMIT = 1.0
+MAX_NODES = 1 << 20  # سقف گره‌ها؛ درختی که جای یک گسترش کامل دیگر ندارد با حرکت بعد از نو ساخته می‌شود
+MIN_SIZE = 7         # از این ابعاد به بعد MCTS تنها بازیکن قوی عملی است
+
+# وضعیت پایانی گره: باز، حرکت منتهی به گره برنده است، صفحه پر و مساوی
+_OPEN, _WIN, _DRAW = 0, 1, 2
+
+
+class MCTSResult(NamedTuple):
+    """نتیجه MCTS: حرکت، نرخ برد آن از دید بازیکن، شبیه‌سازی‌ها، شبیه‌سازی در ثانیه و اندازه درخت"""
+    move: Optional[Tuple[int, int]]
+    win_rate: float
+    playouts: int
+    playouts_per_second: float
+    nodes: int
+
+
+def _other(player: str) -> str:
+    return 'O' if player == 'X' else 'X'
+
+
+class MCTS:
+    """جستجوی درختی مونت‌کارلو با UCT؛ گره‌ها در آرایه‌های فشرده و فرزندان هر گره پشت سر هم ذخیره می‌شوند"""
+
+    def __init__(self, exploration: float = DEFAULT_EXPLORATION, seed: Optional[int] = None,
+                 max_nodes: int = MAX_NODES):
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.max_nodes = max_nodes
+        self.clear()
+
+    def clear(self):
+        """دور ریختن درخت (مثلاً با شروع بازی جدید)"""
+        self._reset(None, None)
+
+    def _reset(self, board: Optional[BitBoard], player: Optional[str]):
+        self.parent = array('i')
+        self.move = array('h')         # خانه حرکتی که به گره رسیده
+        self.first_child = array('i')  # -1 = گسترش‌نیافته
+        self.child_count = array('h')
+        self.visits = array('i')
+        self.wins = array('d')         # از دید بازیکنی که به گره حرکت کرده (مساوی = نیم)
+        self.terminal = array('b')
+        self.root = 0
+        self.root_board = board.copy() if board is not None else None
+        self.root_player = player
+        if board is not None:
+            self._add(-1, -1, _OPEN)
+
+    def _add(self, parent: int, move: int, terminal: int):
+        self.parent.append(parent)
+        self.move.append(move)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        self.terminal.append(terminal)
+
+    @property
+    def nodes(self) -> int:
+        return len(self.visits)
+
+    def _reroot(self, board: BitBoard, player: str):
+        """استفاده دوباره از زیر درخت موقعیت فعلی (پس از حرکت ما و پاسخ حریف)؛ در غیر این صورت درخت تازه"""
+        old = self.root_board
+        if (old is None or old.size != board.size or old.x & ~board.x or old.o & ~board.o
+                or self.max_nodes - self.nodes < board.size * board.size):
+            self._reset(board, player)
+            return
+        added = (board.x ^ old.x) | (board.o ^ old.o)
+        node = self.root
+        mover = self.root_player
+        while added:
+            candidates = board.mask(mover) & added
+            first = self.first_child[node]
+            for child in range(first, first + self.child_count[node]):
+                if candidates >> self.move[child] & 1:
+                    break
+            else:
+                self._reset(board, player)
+                return
+            node = child
+            added &= ~(1 << self.move[child])
+            mover = _other(mover)
+        if mover != player:
+            self._reset(board, player)
+            return
+        self._compact(node)
+        self.root_board = board.copy()
+        self.root_player = player
+        if self.max_nodes - self.nodes < board.size * board.size:
+            self._reset(board, player)
+
+    def _compact(self, root: int):
+        """نگه داشتن فقط زیر درخت root؛ گره‌های دیگر از دسترس خارج‌اند و آرایه‌ها را پر نگه می‌دارند
+
+        کپی به ترتیب BFS انجام می‌شود تا فرزندان هر گره همچنان پشت سر هم بمانند
+        """
+        old = (self.move, self.first_child, self.child_count, self.visits, self.wins, self.terminal)
+        move, first_child, child_count, visits, wins, terminal = old
+        self._reset(None, None)
+        self._add(-1, move[root], terminal[root])
+        self.visits[0] = visits[root]
+        self.wins[0] = wins[root]
+        queue = deque([(root, 0)])
+        while queue:
+            node, new = queue.popleft()
+            first = first_child[node]
+            if first < 0:
+                continue
+            self.first_child[new] = self.nodes
+            self.child_count[new] = child_count[node]
+            for child in range(first, first + child_count[node]):
+                queue.append((child, self.nodes))
+                self._add(new, move[child], terminal[child])
+                self.visits[-1] = visits[child]
+                self.wins[-1] = wins[child]
+
+    def _select(self, node: int) -> int:
+        """فرزند با بیشترین UCT؛ فرزند بازدیدنشده بی‌درنگ انتخاب می‌شود"""
+        visits = self.visits
+        wins = self.wins
+        first = self.first_child[node]
+        scale = self.exploration * math.sqrt(math.log(max(visits[node], 1)))
+        best = first
+        best_value = -1.0
+        for child in range(first, first + self.child_count[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            value = wins[child] / n + scale / math.sqrt(n)
+            if value > best_value:
+                best = child
+                best_value = value
+        return best
+
+    def _expand(self, node: int, board: BitBoard, player: str):
+        """افزودن همه فرزندان با ترتیب تصادفی (تا فرزندان بازدیدنشده به ترتیب تصادفی امتحان شوند)"""
+        moves = list(board.empty_indices())
+        self.rng.shuffle(moves)
+        self.first_child[node] = self.nodes
+        self.child_count[node] = len(moves)
+        for index in moves:
+            board.play(index, player)
+            terminal = _WIN if board.wins_at(index, player) else _DRAW if board.is_full() else _OPEN
+            board.unplay(index, player)
+            self._add(node, index, terminal)
+
+    def _rollout(self, board: BitBoard, player: str) -> Optional[str]:
+        """بازی تصادفی تا پایان با بررسی سریع برد روی خطوط گذرنده از آخرین حرکت؛ برنده یا None"""
+        moves = list(board.empty_indices())
+        self.rng.shuffle(moves)
+        for index in moves:
+            board.play(index, player)
+            if board.wins_at(index, player):
+                return player
+            player = _other(player)
+        return None
+
+    def _playout(self):
+        board = self.root_board.copy()
+        player = self.root_player
+        node = self.root
+        first_child = self.first_child
+        terminal = self.terminal
+
+        # انتخاب
+        while first_child[node] >= 0 and terminal[node] == _OPEN:
+            node = self._select(node)
+            board.play(self.move[node], player)
+            player = _other(player)
+
+        # گسترش: برگ باز پس از اولین بازدید (یا ریشه) گسترش می‌یابد
+        if (terminal[node] == _OPEN and (self.visits[node] > 0 or node == self.root)
+                and self.nodes + board.size * board.size <= self.max_nodes):
+            self._expand(node, board, player)
+            node = self._select(node)
+            board.play(self.move[node], player)
+            player = _other(player)
+
+        # شبیه‌سازی
+        if terminal[node] == _WIN:
+            winner = _other(player)
+        elif terminal[node] == _DRAW:
+            winner = None
+        else:
+            winner = self._rollout(board, player)
+
+        # پس‌انتشار تا ریشه فعلی
+        mover = _other(player)
+        while True:
+            self.visits[node] += 1
+            if winner is None:
+                self.wins[node] += 0.5
+            elif winner == mover:
+                self.wins[node] += 1.0
+            if node == self.root:
+                break
+            node = self.parent[node]
+            mover = _other(mover)
+
+    def search(self, board, player: str, time_limit: Optional[float] = None, playouts: Optional[int] = None,
+               stop=None, progress: Optional[Callable[[int, float], None]] = None) -> MCTSResult:
+        """شبیه‌سازی تا پایان time_limit (ثانیه) یا playouts شبیه‌سازی؛ پرتکرارترین حرکت ریشه برمی‌گردد
+
+        stop با is_set() جستجو را متوقف می‌کند؛ progress(شبیه‌سازی‌ها، شبیه‌سازی در ثانیه) هر ۶۴ شبیه‌سازی
+        """
+        board = as_bitboard(board)
+        self._reroot(board, player)
+        if board.is_full() or board.has_won('X') or board.has_won('O'):
+            return MCTSResult(None, 0.0, 0, 0.0, self.nodes)
+        if time_limit is None and playouts is None:
+            time_limit = DEFAULT_TIME_LIMIT
+
+        if self.first_child[self.root] < 0:
+            # گسترش ریشه پیش از شبیه‌سازی تا حتی با playouts=0 حرکتی برای انتخاب باشد
+            self._expand(self.root, board.copy(), player)
+
+        start = time.perf_counter()
+        deadline = start + time_limit if time_limit is not None else None
+        count = 0
+        while playouts is None or count < playouts:
+            if (count & 63) == 0 and count:
+                now = time.perf_counter()
+                if progress is not None:
+                    progress(count, count / max(now - start, 1e-9))
+                if deadline is not None and now > deadline:
+                    break
+                if stop is not None and stop.is_set():
+                    break
+            self._playout()
+            count += 1
+        elapsed = max(time.perf_counter() - start, 1e-9)
+
+        root = self.root
+        first = self.first_child[root]
+        if self.child_count[root] == 0:
+            return MCTSResult(None, 0.0, count, count / elapsed, self.nodes)
+        best = max(range(first, first + self.child_count[root]), key=self.visits.__getitem__)
+        visits = self.visits[best]
+        return MCTSResult(divmod(self.move[best], board.size), self.wins[best] / visits if visits else 0.0,
+                          count, count / elapsed, self.nodes)
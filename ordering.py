@@ -0,0 +1,101 @@
+import heapq
+from typing import Dict, List, Optional
+
+from csp_model import Cell, CSPModel
+
+VALUE_ORDER = ('X', 'O')
+
+VARIABLE_ORDERS = ('static', 'mrv', 'domwdeg')
+VALUE_ORDERS = ('default', 'lcv')
+
+
+class _HeapOrder:
+    """انتخاب متغیر با صف اولویت و ابطال تنبل؛ با هر تغییر دامنه فقط همان خانه دوباره درج می‌شود"""
+
+    def __init__(self, model: CSPModel, variables: List[Cell]):
+        self.model = model
+        self.index = {var: i for i, var in enumerate(variables)}
+        # درجه هر متغیر به همان معنای degree_heuristic: خانه‌های خالی خطوط گذرنده
+        self.degree = {var: sum(model.counts[name][''] for name in model.cell_constraints[var])
+                       for var in variables}
+        self.heap = [(self.key(var), var) for var in variables]
+        heapq.heapify(self.heap)
+
+    def key(self, var: Cell) -> tuple:
+        raise NotImplementedError
+
+    def push(self, var: Cell):
+        if var in self.index:
+            heapq.heappush(self.heap, (self.key(var), var))
+
+    def select(self, assignment: Dict) -> Optional[Cell]:
+        """متغیر تخصیص‌نیافته با کمترین کلید (بدون برداشتن از صف)"""
+        heap = self.heap
+        while heap:
+            key, var = heap[0]
+            if var in assignment or key != self.key(var):
+                heapq.heappop(heap)
+                continue
+            return var
+        return None
+
+    def unassigned(self, var: Cell):
+        """بازگشت متغیر به صف هنگام پس‌گرد"""
+        self.push(var)
+
+    def domain_changed(self, cell: Cell):
+        self.push(cell)
+
+    def conflict(self, var: Cell, neighbor: Cell):
+        """شکست سازگاری بین var و neighbor (برای وزن‌دهی محدودیت‌ها)"""
+
+
+class MRVOrder(_HeapOrder):
+    """کمترین مقادیر باقی‌مانده؛ تساوی با بیشترین درجه و سپس ترتیب ردیفی"""
+
+    def key(self, var: Cell) -> tuple:
+        return len(self.model.domains[var]), -self.degree[var], self.index[var]
+
+
+class DomWdegOrder(_HeapOrder):
+    """اندازه دامنه تقسیم بر مجموع وزن محدودیت‌ها؛ وزن هر محدودیت با هر شکست یکی زیاد می‌شود"""
+
+    def __init__(self, model: CSPModel, variables: List[Cell]):
+        self.weights = {name: 1 for name in model.constraints}
+        super().__init__(model, variables)
+
+    def key(self, var: Cell) -> tuple:
+        wdeg = sum(self.weights[name] for name in self.model.cell_constraints[var])
+        return len(self.model.domains[var]) / wdeg, self.index[var]
+
+    def conflict(self, var: Cell, neighbor: Cell):
+        names = self.model.cell_constraints[neighbor]
+        for name in self.model.cell_constraints[var]:
+            if name in names:
+                self.weights[name] += 1
+                for cell in self.model.constraints[name]:
+                    self.push(cell)
+                return
+
+
+def make_variable_order(name: str, model: CSPModel, variables: List[Cell]) -> Optional[_HeapOrder]:
+    """راهبرد انتخاب متغیر؛ None برای ترتیب ردیفی select_unassigned_variable"""
+    if name == 'static':
+        return None
+    if name == 'mrv':
+        return MRVOrder(model, variables)
+    if name == 'domwdeg':
+        return DomWdegOrder(model, variables)
+    raise ValueError(f"ترتیب متغیر ناشناخته: {name}")
+
+
+def least_constraining_values(model: CSPModel, var: Cell, assignment: Dict) -> List[str]:
+    """مقادیر var به ترتیب کمترین حذف از دامنه همسایه‌های تخصیص‌نیافته"""
+    ruled_out = {}
+    for value in model.domains[var]:
+        count = 0
+        for neighbor in model.neighbors[var]:
+            if neighbor not in assignment and model.value(neighbor) == '' and value in model.domains[neighbor]:
+                count += 1
+        ruled_out[value] = count
+    return sorted(ruled_out, key=lambda value: (ruled_out[value], VALUE_ORDER.index(value)))
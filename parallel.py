@@ -0,0 +1,292 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from bitboard import BitBoard, as_bitboard
+from search import DEFAULT_TIME_LIMIT, MAX_PLY, WIN_SCORE, NegamaxSearch, SearchResult
+from tablebase import DEFAULT_DIR
+from transposition import DEFAULT_BUDGET_MB, ENTRY_BYTES, TranspositionTable
+
+DEFAULT_CHUNKSIZE = 64
+MIN_PARALLEL_BOARDS = 256   # کارهای کوچک‌تر در همین فرایند اجرا می‌شوند
+MIN_PARALLEL_MOVES = 4
+PARALLEL_MODES = ('smp', 'root')
+POLL_SECONDS = 0.05         # فاصله انتقال پرچم توقف و پیشرفت بین والد و کارگرها
+
+# تحلیلگر هر فرایند کارگر. متدهای GameAnalyzer بی‌حالت نیستند و وضعیت هر فراخوانی (مدل، دامنه‌ها،
+# آمارها، last_search) را روی self نگه می‌دارند؛ به جای هسته بی‌حالت، هر کارگر تحلیلگر خودش را دارد و
+# بسته‌ها را پشت سر هم روی آن اجرا می‌کند. هر متد آن وضعیت را در شروع فراخوانی از نو می‌سازد (مدل با
+# sync(board) هم‌گام می‌شود)، پس نتیجه یک صفحه به صفحه‌های قبلی همان کارگر وابسته نیست
+_worker_analyzer = None
+
+
+def _init_worker(tablebase_dir: Optional[str]):
+    global _worker_analyzer
+    from algorithms import GameAnalyzer
+    _worker_analyzer = GameAnalyzer(tablebase_dir)
+
+
+def _encode(board) -> Tuple[int, int, int]:
+    """صفحه فشرده برای ارسال به کارگر: (ابعاد، ماسک X، ماسک O)"""
+    if not isinstance(board, (BitBoard, list)):
+        import evaluator
+        board = evaluator.to_bitboard(board)
+    board = as_bitboard(board)
+    return board.size, board.x, board.o
+
+
+def _analyze_chunk(method: str, kwargs: dict, chunk: List[Tuple[int, int, int]]) -> list:
+    boards = (BitBoard(size, x, o) for size, x, o in chunk)
+    return list(_worker_analyzer.analyze_many(boards, method, **kwargs))
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def analyze_parallel(boards: Iterable, method: str = 'backtracking_search', workers: Optional[int] = None,
+                     chunksize: int = DEFAULT_CHUNKSIZE, min_parallel: int = MIN_PARALLEL_BOARDS,
+                     tablebase_dir: Optional[str] = DEFAULT_DIR, **kwargs) -> Iterator:
+    """تحلیل صفحه‌ها روی همه هسته‌ها با بسته‌های chunksize تایی؛ نتایج به همان ترتیب ورودی برمی‌گردند"""
+    workers = workers or default_workers()
+    boards = iter(boards)
+    head = list(islice(boards, min_parallel))
+    if workers <= 1 or len(head) < min_parallel:
+        # کار کوچک: هزینه راه‌اندازی فرایندها بیشتر از سود آن است
+        from algorithms import GameAnalyzer
+        analyzer = GameAnalyzer(tablebase_dir)
+        yield from analyzer.analyze_many(head, method, **kwargs)
+        yield from analyzer.analyze_many(boards, method, **kwargs)
+        return
+
+    remaining = chain(head, boards)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_context(), initializer=_init_worker,
+                             initargs=(tablebase_dir,)) as pool:
+        in_flight = deque()
+        while True:
+            chunk = [_encode(board) for board in islice(remaining, chunksize)]
+            if not chunk:
+                break
+            in_flight.append(pool.submit(_analyze_chunk, method, kwargs, chunk))
+            # تعداد بسته‌های در جریان محدود است تا حافظه ثابت بماند
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _parent_score(score: int) -> int:
+    """امتیاز ریشه فرزند (از دید حریف) به امتیاز والد با یک نیم‌حرکت فاصله بیشتر"""
+    if score >= WIN_SCORE - MAX_PLY:
+        score -= 1
+    elif score <= -(WIN_SCORE - MAX_PLY):
+        score += 1
+    return -score
+
+
+def _search_root_move(args, stop=None) -> Tuple[int, int, List[int], int, int]:
+    """جستجوی زیر درخت یک حرکت ریشه: (حرکت، امتیاز از دید ریشه، دنباله، تعداد گره، عمق کامل‌شده)
+
+    در کارگر stop همان پرچم مشترک SearchPool است
+    """
+    size, x, o, index, player, depth, deadline = args
+    board = BitBoard(size, x, o)
+    board.play(index, player)
+    if board.wins_at(index, player):
+        return index, WIN_SCORE, [index], 1, MAX_PLY
+    opponent = 'O' if player == 'X' else 'X'
+    if board.is_full():
+        return index, -board.evaluate(opponent), [index], 1, MAX_PLY
+    time_limit = deadline - time.time() if deadline is not None else None
+    if depth == 1 or (time_limit is not None and time_limit <= 0):
+        return index, -board.evaluate(opponent), [index], 1, 1
+    result = NegamaxSearch().search(board, opponent, depth - 1, time_limit, stop or _shared_stop)
+    if result.depth == 0:
+        return index, -board.evaluate(opponent), [index], result.nodes + 1, 1
+    pv = [index] + [r * size + c for r, c in result.pv]
+    completed = MAX_PLY if abs(result.score) >= WIN_SCORE - MAX_PLY else result.depth + 1
+    return index, _parent_score(result.score), pv, result.nodes + 1, completed
+
+
+def _root_results(pool: Optional['SearchPool'], tasks, stop) -> list:
+    if pool is None:
+        return [_search_root_move(task, stop) for task in tasks]
+    return pool.run(_search_root_move, tasks, stop)
+
+
+def _root_split(pool: Optional['SearchPool'], board: BitBoard, player: str, depth: Optional[int],
+                time_limit: Optional[float], stop=None,
+                progress: Optional[Callable[[int, int], None]] = None) -> SearchResult:
+    """تقسیم ریشه روی pool (None = همین فرایند)؛ progress(گره‌ها، عمق) پس از هر عمق کامل"""
+    moves = list(board.empty_indices())
+    if not moves:
+        return SearchResult(None, board.evaluate(player), [], 0, 0)
+    if depth is None and time_limit is None:
+        time_limit = DEFAULT_TIME_LIMIT
+    deadline = time.time() + time_limit if time_limit is not None else None
+    depths = [depth] if deadline is None else range(1, min(depth or len(moves), len(moves)) + 1)
+
+    best = None
+    nodes = 1
+    for current in depths:
+        tasks = [(board.size, board.x, board.o, index, player, current, deadline) for index in moves]
+        results = _root_results(pool, tasks, stop)
+        nodes += sum(r[3] for r in results)
+        if best is not None and min(r[4] for r in results) < current:
+            break  # مهلت یا توقف در میانه این عمق؛ عمق قبلی معتبر است
+        index, score, pv, _, _ = max(results, key=lambda r: r[1])
+        best = SearchResult(divmod(index, board.size), score,
+                            [divmod(cell, board.size) for cell in pv], 0, current)
+        if progress is not None:
+            progress(nodes, current)
+        if deadline is not None and time.time() >= deadline:
+            break
+        if stop is not None and stop.is_set():
+            break
+    return best._replace(nodes=nodes)
+
+
+# جدول جابجایی مشترک (روی حافظه مشترک RawArray)، پرچم توقف و صف پیشرفت کارگرهای SearchPool
+_shared_tt = None
+_shared_stop = None
+_progress_queue = None
+
+
+def _init_search_worker(buffer, stop, progress_queue):
+    global _shared_tt, _shared_stop, _progress_queue
+    _shared_tt = TranspositionTable(buffer=buffer)
+    _shared_stop = stop
+    _progress_queue = progress_queue
+
+
+def _ready(_) -> None:
+    return None
+
+
+def _smp_search(args) -> SearchResult:
+    """یک رشته Lazy-SMP: عمیق‌شونده تکراری کامل با ترتیب حرکات متفاوت روی جدول مشترک
+
+    فقط کارگر صفر (با report) پیشرفتش را در صف مشترک می‌گذارد
+    """
+    size, x, o, player, depth, deadline, seed, report = args
+    time_limit = max(0.0, deadline - time.time()) if deadline is not None else None
+    engine = NegamaxSearch(tt=_shared_tt, seed=seed or None)
+    progress = (lambda nodes, depth: _progress_queue.put((nodes, depth))) if report else None  # noqa: E731
+    return engine.search(BitBoard(size, x, o), player, depth, time_limit, _shared_stop, progress)
+
+
+def _context():
+    """forkserver (یا spawn)؛ fork از رشته پس‌زمینه برنامه Tk قفل‌ها و رشته‌های والد را کپی می‌کند"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class SearchPool:
+    """فرایندهای کارگر و جدول جابجایی مشترک ماندگار برای جستجوی موازی
+
+    یک بار (مثلاً در new_game) ساخته می‌شود و در حرکت‌های بعدی همان فرایندها و همان جدول استفاده
+    می‌شوند؛ هزینه راه‌اندازی فرایندها از مهلت حرکت کم نمی‌شود
+    """
+
+    def __init__(self, workers: Optional[int] = None, budget_mb: float = DEFAULT_BUDGET_MB):
+        self.workers = workers or default_workers()
+        context = _context()
+        entries = max(2, int(budget_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.buffer = context.RawArray('B', entries * ENTRY_BYTES)
+        self._stop = context.Event()
+        self._progress = context.SimpleQueue()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_init_search_worker,
+                                         initargs=(self.buffer, self._stop, self._progress))
+        # ارسال هم‌زمان یک کار به ازای هر کارگر همه فرایندها را همین حالا راه می‌اندازد
+        list(self._pool.map(_ready, range(self.workers)))
+
+    def clear(self):
+        """خالی کردن جدول مشترک (شروع بازی تازه)"""
+        view = memoryview(self.buffer).cast('B')
+        view[:] = bytes(len(view))
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+
+    def _drain(self, progress=None):
+        while not self._progress.empty():
+            report = self._progress.get()
+            if progress is not None:
+                progress(*report)
+
+    def run(self, func, tasks, stop=None, progress: Optional[Callable[[int, int], None]] = None) -> list:
+        """اجرای func روی کارگرها؛ هنگام انتظار stop به پرچم مشترک و پیشرفت کارگر صفر به progress منتقل می‌شود"""
+        self._stop.clear()
+        self._drain()  # گزارش‌های جامانده جستجوی قبلی
+        futures = [self._pool.submit(func, task) for task in tasks]
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=POLL_SECONDS)
+            if stop is not None and stop.is_set():
+                self._stop.set()
+            self._drain(progress)
+        return [future.result() for future in futures]
+
+    def __enter__(self) -> 'SearchPool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def smp_search(self, board, player: str, depth: Optional[int] = None, time_limit: Optional[float] = None,
+                   stop=None, progress: Optional[Callable[[int, int], None]] = None) -> SearchResult:
+        """Lazy-SMP: همه کارگرها کل درخت را با جدول مشترک جستجو می‌کنند؛ عمیق‌ترین نتیجه برنده است"""
+        board = as_bitboard(board)
+        if depth is None and time_limit is None:
+            time_limit = DEFAULT_TIME_LIMIT
+        deadline = time.time() + time_limit if time_limit is not None else None
+        tasks = [(board.size, board.x, board.o, player, depth, deadline, seed, seed == 0 and progress is not None)
+                 for seed in range(self.workers)]
+        results = self.run(_smp_search, tasks, stop, progress)
+        # کارگر صفر ترتیب قطعی دارد و در تساوی عمق ترجیح داده می‌شود
+        best = max(results, key=lambda r: r.depth)
+        return best._replace(nodes=sum(r.nodes for r in results))
+
+    def root_split_search(self, board, player: str, depth: Optional[int] = None, time_limit: Optional[float] = None,
+                          stop=None, progress: Optional[Callable[[int, int], None]] = None) -> SearchResult:
+        board = as_bitboard(board)
+        moves = board.size * board.size - board.filled_count()
+        return _root_split(self if moves >= MIN_PARALLEL_MOVES else None, board, player, depth, time_limit,
+                           stop, progress)
+
+
+def root_split_search(board, player: str, depth: Optional[int] = None, workers: Optional[int] = None,
+                      time_limit: Optional[float] = None, stop=None,
+                      progress: Optional[Callable[[int, int], None]] = None) -> SearchResult:
+    """تقسیم حرکات ریشه بین فرایندها؛ هر کارگر زیر درخت یک حرکت را تا depth-1 جستجو می‌کند
+
+    با time_limit عمق ریشه تکراری افزایش می‌یابد و با پایان مهلت نتیجه آخرین عمق کامل برمی‌گردد؛
+    برای چند حرکت پشت سر هم SearchPool ماندگار ارزان‌تر است
+    """
+    board = as_bitboard(board)
+    workers = workers or default_workers()
+    moves = board.size * board.size - board.filled_count()
+    if workers <= 1 or moves < MIN_PARALLEL_MOVES:
+        return _root_split(None, board, player, depth, time_limit, stop, progress)
+    with SearchPool(min(workers, moves), budget_mb=0) as pool:
+        return pool.root_split_search(board, player, depth, time_limit, stop, progress)
+
+
+def lazy_smp_search(board, player: str, depth: Optional[int] = None, workers: Optional[int] = None,
+                    time_limit: Optional[float] = None, budget_mb: float = DEFAULT_BUDGET_MB, stop=None,
+                    progress: Optional[Callable[[int, int], None]] = None) -> SearchResult:
+    """جستجوی Lazy-SMP یک‌باره؛ برای چند حرکت پشت سر هم SearchPool ماندگار ارزان‌تر است"""
+    board = as_bitboard(board)
+    workers = workers or default_workers()
+    if workers <= 1:
+        if depth is None and time_limit is None:
+            time_limit = DEFAULT_TIME_LIMIT
+        return NegamaxSearch(tt=TranspositionTable(budget_mb)).search(board, player, depth, time_limit,
+                                                                      stop, progress)
+    with SearchPool(workers, budget_mb) as pool:
+        return pool.smp_search(board, player, depth, time_limit, stop, progress)
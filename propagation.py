@@ -0,0 +1,89 @@
+from collections import deque
+from typing import Dict, NamedTuple, Optional
+
+from csp_model import Cell, CSPModel, uniform_value
+
+
+class PropagationStats(NamedTuple):
+    """آمار انتشار محدودیت"""
+    revisits: int  # تعداد خطوطی که از فهرست کار برداشته و بازبینی شدند
+    prunings: int  # تعداد مقادیر حذف‌شده از دامنه‌ها
+    pushes: int    # تعداد خطوطی که به فهرست کار افزوده شدند
+
+
+class LinePropagator:
+    """انتشار محدودیت با فهرست کار خطوط کثیف: اگر خانه‌های قطعی یک خط همه یک نماد باشند، آن نماد از
+    دامنه خانه‌های باز همان خط حذف می‌شود
+
+    شمارنده X/O خانه‌های قطعی هر خط افزایشی نگه داشته می‌شود و فقط خطوط گذرنده از خانه‌ای که تازه قطعی
+    شده دوباره بررسی می‌شوند؛ حذف از دامنه خانه‌های باز شمارنده‌ای را تغییر نمی‌دهد
+    """
+
+    def __init__(self, model: CSPModel, include_board: bool = True):
+        self.model = model
+        # include_board=False: فقط تخصیص‌های جستجو قطعی‌اند (برای استفاده درون پس‌گرد)
+        self.include_board = include_board
+        self.counts: Dict[str, Dict[str, int]] = {
+            name: {'X': counts['X'] if include_board else 0, 'O': counts['O'] if include_board else 0}
+            for name, counts in model.counts.items()
+        }
+        self._queue = deque()
+        self._queued = set()
+        self.revisits = 0
+        self.prunings = 0
+        self.pushes = 0
+
+    @property
+    def stats(self) -> PropagationStats:
+        return PropagationStats(self.revisits, self.prunings, self.pushes)
+
+    def _push(self, name: str):
+        if name not in self._queued:
+            self._queued.add(name)
+            self._queue.append(name)
+            self.pushes += 1
+
+    def mark_all(self):
+        """همه خطوط کثیف (برای اجرای مستقل)"""
+        for name in self.model.constraints:
+            self._push(name)
+
+    def assign(self, cell: Cell, value: str):
+        """قطعی شدن خانه؛ فقط خطوط گذرنده از آن کثیف می‌شوند"""
+        for name in self.model.cell_constraints[cell]:
+            self.counts[name][value] += 1
+            self._push(name)
+
+    def unassign(self, cell: Cell, value: str):
+        for name in self.model.cell_constraints[cell]:
+            self.counts[name][value] -= 1
+
+    def _decided(self, cell: Cell, assignment: Optional[Dict]) -> bool:
+        return self.model.value(cell) != '' or (assignment is not None and cell in assignment)
+
+    def propagate(self, assignment: Optional[Dict] = None, stop_on_wipeout: bool = True) -> bool:
+        """اجرا تا خالی شدن فهرست کار؛ False اگر دامنه‌ای خالی شود (حذف‌ها در trail مدل ثبت می‌شوند)
+
+        stop_on_wipeout=False همه حذف‌ها را انجام می‌دهد (رفتار انتشار مستقل)
+        """
+        model = self.model
+        ok = True
+        domains = model.domains
+        queue = self._queue
+        while queue:
+            name = queue.popleft()
+            self._queued.discard(name)
+            self.revisits += 1
+            value = uniform_value(self.counts[name])
+            if value is None:
+                continue
+            for cell in model.constraints[name]:
+                if value in domains[cell] and not self._decided(cell, assignment):
+                    self.prunings += 1
+                    if model.prune(cell, value):
+                        ok = False
+                        if stop_on_wipeout:
+                            queue.clear()
+                            self._queued.clear()
+                            return False
+        return ok
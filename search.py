@@ -0,0 +1,260 @@
+import random
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from bitboard import BitBoard, as_bitboard
+from transposition import EXACT, LOWER, UPPER, TranspositionTable, ZobristHasher
+
+WIN_SCORE = 1000000  # امتیاز برد؛ با فاصله تا برد کم می‌شود تا برد سریع‌تر ترجیح داده شود
+MAX_PLY = 256
+DEFAULT_TIME_LIMIT = 1.0
+
+
+class SearchResult(NamedTuple):
+    """نتیجه جستجو: حرکت، امتیاز، دنباله اصلی، تعداد گره‌ها و عمق کامل‌شده"""
+    move: Optional[Tuple[int, int]]
+    score: int
+    pv: List[Tuple[int, int]]
+    nodes: int
+    depth: int
+
+
+class _SearchTimeout(Exception):
+    """پایان زمان جستجو در میانه یک تکرار"""
+
+
+class NegamaxSearch:
+    """جستجوی نگامکس با هرس آلفا-بتا، عمیق‌شونده تکراری و مرتب‌سازی حرکات"""
+
+    def __init__(self, evaluate: Optional[Callable[[BitBoard, str], int]] = None,
+                 tt: Optional[TranspositionTable] = None,
+                 batch_evaluate: Optional[Callable] = None, seed: Optional[int] = None):
+        # تابع ارزیابی از دید بازیکن نوبت (پیش‌فرض: همان امتیازدهی _evaluate_position)
+        self.evaluate = evaluate or (lambda board, player: board.evaluate(player))
+        # جدول جابجایی بین جستجوهای پیاپی یک بازی حفظ می‌شود (None = بدون جدول)
+        self.tt = tt
+        # ارزیابی دسته‌ای همه فرزندان در گره‌های عمق یک: (اندیس‌ها، امتیازها، برنده‌ها)
+        self.batch_evaluate = batch_evaluate
+        # بذر تنوع ترتیب حرکات برای کارگرهای Lazy-SMP (None = قطعی)
+        self.seed = seed
+        self._hasher = None
+        self._hashes = []
+        self.nodes = 0
+        self.evaluations = 0  # تعداد ارزیابی برگ‌ها در آخرین جستجو
+        self._deadline = None
+        self._stop = None
+        self._progress = None
+        self._polling = False
+        self._depth = 0
+        self._killers = []
+        self._history = {}
+        self._pv = []
+        self._prev_pv = []
+
+    def search(self, board, player: str, max_depth: Optional[int] = None,
+               time_limit: Optional[float] = None, stop=None,
+               progress: Optional[Callable[[int, int], None]] = None) -> SearchResult:
+        """جستجوی بهترین حرکت برای player تا عمق max_depth یا پایان زمان time_limit (ثانیه)
+
+        stop (مثلاً threading.Event) با is_set() جستجو را متوقف می‌کند و بهترین نتیجه تاکنون برمی‌گردد؛
+        progress(گره‌ها، عمق) هر ۱۰۲۴ گره و پس از هر عمق کامل صدا زده می‌شود
+        """
+        board = as_bitboard(board).copy()
+        empties = board.size * board.size - board.filled_count()
+        if empties == 0:
+            return SearchResult(None, self.evaluate(board, player), [], 0, 0)
+        if max_depth is None:
+            max_depth = empties
+            if time_limit is None:
+                time_limit = DEFAULT_TIME_LIMIT
+        max_depth = max(1, min(max_depth, empties))
+
+        self.nodes = 0
+        self.evaluations = 0
+        self._deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self._stop = stop
+        self._progress = progress
+        self._polling = self._deadline is not None or stop is not None or progress is not None
+        self._killers = [[None, None] for _ in range(max_depth + 1)]
+        self._history = {'X': [0] * (board.size * board.size), 'O': [0] * (board.size * board.size)}
+        if self.seed is not None:
+            # نویز کوچک فقط تساوی‌های تاریخچه را می‌شکند تا کارگرها زیردرخت‌های متفاوتی را اول ببینند
+            rng = random.Random(self.seed)
+            for table in self._history.values():
+                for index in range(len(table)):
+                    table[index] = rng.randrange(4)
+        self._pv = [[] for _ in range(max_depth + 2)]
+        self._prev_pv = []
+        if self.tt is not None:
+            if self._hasher is None or self._hasher.size != board.size:
+                self._hasher = ZobristHasher(board.size)
+            self._hashes = self._hasher.hashes(board)
+            self.tt.new_search()
+
+        best = None
+        for depth in range(1, max_depth + 1):
+            self._depth = depth
+            self._prev_pv = list(self._pv[0])
+            try:
+                score = self._negamax(board, player, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+            except _SearchTimeout:
+                break
+            pv = [divmod(index, board.size) for index in self._pv[0]]
+            best = SearchResult(pv[0] if pv else None, score, pv, self.nodes, depth)
+            if progress is not None:
+                progress(self.nodes, depth)
+            # برد یا باخت قطعی پیدا شده؛ عمیق‌تر شدن نتیجه را تغییر نمی‌دهد
+            if abs(score) >= WIN_SCORE - MAX_PLY:
+                break
+
+        if best is None:
+            # حتی عمق یک کامل نشد؛ اولین حرکت مرتب‌شده را برگردان
+            index = next(board.empty_indices())
+            return SearchResult(divmod(index, board.size), 0, [divmod(index, board.size)], self.nodes, 0)
+        return best._replace(nodes=self.nodes)
+
+    def _poll(self):
+        """بررسی دوره‌ای مهلت و پرچم توقف و گزارش پیشرفت"""
+        if self._progress is not None:
+            self._progress(self.nodes, self._depth)
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+        if self._stop is not None and self._stop.is_set():
+            raise _SearchTimeout()
+
+    def _order_moves(self, board: BitBoard, player: str, ply: int) -> List[int]:
+        """مرتب‌سازی حرکات: حرکت دنباله اصلی، حرکات قاتل و سپس جدول تاریخچه"""
+        history = self._history[player]
+        moves = sorted(board.empty_indices(), key=lambda index: -history[index])
+        front = []
+        if ply < len(self._prev_pv):
+            front.append(self._prev_pv[ply])
+        front.extend(self._killers[ply])
+        for index in reversed(front):
+            if index is not None and index in moves:
+                moves.remove(index)
+                moves.insert(0, index)
+        return moves
+
+    def _negamax(self, board: BitBoard, player: str, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self._polling and (self.nodes & 1023) == 0:
+            self._poll()
+
+        if depth == 0 or board.is_full():
+            self._pv[ply] = []
+            self.evaluations += 1
+            return self.evaluate(board, player)
+
+        tt = self.tt
+        tt_move = -1
+        if tt is not None:
+            key, sym = self._hasher.canonical(self._hashes, player)
+            entry = tt.probe(key)
+            if entry is not None:
+                entry_depth, flag, score, move = entry
+                if move >= 0:
+                    tt_move = self._hasher.inverses[sym][move]
+                if entry_depth >= depth and ply > 0:
+                    score = _score_from_tt(score, ply)
+                    if flag == EXACT:
+                        self._pv[ply] = [tt_move] if tt_move >= 0 else []
+                        return score
+                    if flag == LOWER and score > alpha:
+                        alpha = score
+                    elif flag == UPPER and score < beta:
+                        beta = score
+                    if alpha >= beta:
+                        self._pv[ply] = [tt_move] if tt_move >= 0 else []
+                        return score
+        alpha_orig = alpha
+
+        if depth == 1 and self.batch_evaluate is not None:
+            best_score, best_line = self._batch_frontier(board, player, ply)
+        else:
+            best_score, best_line = self._search_moves(board, player, depth, alpha, beta, ply, tt_move)
+
+        self._pv[ply] = best_line
+        if tt is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            best_move = self._hasher.perms[sym][best_line[0]] if best_line else -1
+            tt.store(key, depth, flag, _score_to_tt(best_score, ply), best_move)
+        return best_score
+
+    def _search_moves(self, board: BitBoard, player: str, depth: int, alpha: int, beta: int,
+                      ply: int, tt_move: int) -> Tuple[int, List[int]]:
+        """پیمایش فرزندان با هرس آلفا-بتا؛ (بهترین امتیاز، دنباله اصلی)"""
+        tt = self.tt
+        opponent = 'O' if player == 'X' else 'X'
+        best_score = -WIN_SCORE - 1
+        best_line = []
+        moves = self._order_moves(board, player, ply)
+        if tt_move >= 0 and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        for index in moves:
+            board.play(index, player)
+            if board.wins_at(index, player):
+                score = WIN_SCORE - ply
+                self._pv[ply + 1] = []
+            else:
+                if tt is not None:
+                    self._hasher.toggle(self._hashes, index, player)
+                score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, ply + 1)
+                if tt is not None:
+                    self._hasher.toggle(self._hashes, index, player)
+            board.unplay(index, player)
+
+            if score > best_score:
+                best_score = score
+                best_line = [index] + self._pv[ply + 1]
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                # ثبت حرکت قاتل و افزایش امتیاز تاریخچه
+                killers = self._killers[ply]
+                if killers[0] != index:
+                    killers[1] = killers[0]
+                    killers[0] = index
+                self._history[player][index] += depth * depth
+                break
+
+        return best_score, best_line
+
+    def _batch_frontier(self, board: BitBoard, player: str, ply: int) -> Tuple[int, List[int]]:
+        """گره عمق یک: همه فرزندان با یک فراخوانی آرایه‌ای ارزیابی می‌شوند"""
+        indices, scores, wins = self.batch_evaluate(board, player)
+        self.nodes += len(indices)
+        self.evaluations += len(indices)
+        best_score = -WIN_SCORE - 1
+        best_index = -1
+        for index, score, win in zip(indices.tolist(), scores.tolist(), wins.tolist()):
+            if win:
+                score = WIN_SCORE - ply
+            if score > best_score:
+                best_score = score
+                best_index = index
+        self._pv[ply + 1] = []
+        return best_score, [best_index]
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    """امتیاز برد/باخت را نسبت به گره فعلی (نه ریشه) ذخیره کن"""
+    if score >= WIN_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -(WIN_SCORE - MAX_PLY):
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= WIN_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -(WIN_SCORE - MAX_PLY):
+        return score + ply
+    return score
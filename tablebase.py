@@ -0,0 +1,297 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Dict, List, Optional, Tuple
+
+from bitboard import BitBoard, as_bitboard
+from transposition import symmetries
+
+MAGIC = b'TTTB'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBx')  # جادویی، نسخه، اندازه صفحه، کمترین تعداد مهره
+# پس از سرآیند برای هر تعداد مهره ۰ تا N²: آفست، تعداد ورودی‌ها و پهنای رتبه (بایت)
+BLOCK = struct.Struct('<QIB3x')
+
+# فقط وضعیت‌های متعارف غیرپایانی ذخیره می‌شوند؛ هر بلوک (تعداد مهره) رتبه‌های ترکیبی مرتب با پهنای
+# ثابت و پشت آن‌ها یک بایت نتیجه برای هر رتبه دارد: دو بیت پایین نتیجه برای بازیکن نوبت، شش بیت بالا
+# فاصله تا پایان
+UNKNOWN, WIN, DRAW, LOSS = 0, 1, 2, 3
+MAX_DISTANCE = 63
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases')
+
+
+def default_path(size: int) -> str:
+    return os.path.join(DEFAULT_DIR, f'tb_{size}.bin')
+
+
+@lru_cache(maxsize=None)
+def _rank_weights(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """برای هر تقارن و هر خانه، وزن سه‌تایی 3^(تصویر خانه)"""
+    return tuple(tuple(3 ** image for image in perm) for perm in symmetries(size))
+
+
+def canonical_rank(board: BitBoard) -> int:
+    """رتبه سه‌تایی متعارف (کمینه روی هشت تقارن): X=1 و O=2 در هر رقم"""
+    best = None
+    for weights in _rank_weights(board.size):
+        rank = 0
+        bits = board.x
+        while bits:
+            low = bits & -bits
+            rank += weights[low.bit_length() - 1]
+            bits ^= low
+        bits = board.o
+        while bits:
+            low = bits & -bits
+            rank += 2 * weights[low.bit_length() - 1]
+            bits ^= low
+        if best is None or rank < best:
+            best = rank
+    return best
+
+
+def _canonical_board(size: int, rank: int) -> Tuple[List[int], List[int]]:
+    """خانه‌های X و O (صعودی) وضعیت متعارف از روی رتبه سه‌تایی آن"""
+    xs, os_ = [], []
+    for cell in range(size * size):
+        rank, digit = divmod(rank, 3)
+        if digit == 1:
+            xs.append(cell)
+        elif digit == 2:
+            os_.append(cell)
+    return xs, os_
+
+
+def _block_size(cells: int, x_count: int, o_count: int) -> int:
+    return comb(cells, x_count) * comb(cells - x_count, o_count)
+
+
+def block_rank(size: int, rank: int) -> Tuple[int, int]:
+    """(تعداد مهره، رتبه ترکیبی) وضعیت متعارف؛ درهم‌سازی کامل درون بلوک (تعداد X، تعداد O)
+
+    رتبه مجموعه X بین C(N², x) ترکیب و رتبه O بین خانه‌های باقی‌مانده با سیستم ترکیبی (colex)
+    """
+    xs, os_ = _canonical_board(size, rank)
+    x_rank = sum(comb(cell, i + 1) for i, cell in enumerate(xs))
+    o_rank = 0
+    below = 0  # تعداد خانه‌های X پیش از خانه فعلی
+    for i, cell in enumerate(os_):
+        while below < len(xs) and xs[below] < cell:
+            below += 1
+        o_rank += comb(cell - below, i + 1)
+    free = size * size - len(xs)
+    return len(xs) + len(os_), x_rank * comb(free, len(os_)) + o_rank
+
+
+def side_to_move(board: BitBoard) -> str:
+    """X همیشه شروع می‌کند؛ بازیکن نوبت از تعداد مهره‌ها معلوم است"""
+    return 'X' if board.x.bit_count() == board.o.bit_count() else 'O'
+
+
+class Tablebase:
+    """جدول پایانی حل‌شده که با mmap باز می‌شود؛ جستجو یک جستجوی دودویی در بلوک تعداد مهره‌هاست"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.min_pieces = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"فایل جدول پایانی نامعتبر است: {path}")
+        self.blocks = [BLOCK.unpack_from(self._map, HEADER.size + pieces * BLOCK.size)
+                       for pieces in range(self.size * self.size + 1)]
+
+    def _lookup(self, pieces: int, rank: int) -> int:
+        """بایت نتیجه یا UNKNOWN اگر رتبه در بلوک نیست"""
+        offset, count, width = self.blocks[pieces]
+        data = self._map
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            start = offset + mid * width
+            value = int.from_bytes(data[start:start + width], 'little')
+            if value < rank:
+                low = mid + 1
+            elif value > rank:
+                high = mid
+            else:
+                return data[offset + count * width + mid]
+        return UNKNOWN
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def probe(self, board, player: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """(نتیجه، فاصله) برای بازیکن نوبت، یا None اگر وضعیت در جدول نیست"""
+        board = as_bitboard(board)
+        if board.size != self.size:
+            return None
+        mover = side_to_move(board)
+        if player is not None and player != mover:
+            return None
+        # وضعیت‌های پایانی در فایل نیستند و همین‌جا محاسبه می‌شوند
+        if board.has_won('O' if mover == 'X' else 'X'):
+            return LOSS, 0
+        if board.is_full():
+            return DRAW, 0
+        value = self._lookup(*block_rank(self.size, canonical_rank(board)))
+        if value & 3 == UNKNOWN:
+            return None
+        return value & 3, value >> 2
+
+    def best_move(self, board, player: Optional[str] = None) -> Optional[Tuple[Tuple[int, int], int, int]]:
+        """(حرکت، نتیجه، فاصله) بهترین حرکت طبق جدول یا None"""
+        board = as_bitboard(board)
+        if board.size != self.size:
+            return None
+        mover = side_to_move(board)
+        if player is not None and player != mover:
+            return None
+        opponent = 'O' if mover == 'X' else 'X'
+        if board.has_won(opponent) or board.is_full():
+            return None  # بازی تمام شده است
+        child = board.copy()
+        best = None
+        best_key = None
+        for index in board.empty_indices():
+            child.play(index, mover)
+            if child.wins_at(index, mover):
+                child.unplay(index, mover)
+                return divmod(index, board.size), WIN, 1
+            entry = self.probe(child)
+            child.unplay(index, mover)
+            if entry is None:
+                return None
+            result, distance = entry
+            # از دید حرکت‌کننده: باخت حریف بهترین (سریع‌ترین)، برد حریف بدترین (دیرترین)
+            if result == LOSS:
+                key, ours = (0, distance), WIN
+            elif result == DRAW:
+                key, ours = (1, distance), DRAW
+            else:
+                key, ours = (2, -distance), LOSS
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (divmod(index, board.size), ours, min(distance + 1, MAX_DISTANCE))
+        return best
+
+
+def _solve(board: BitBoard, mover: str, last: Optional[int], table: Dict[int, int]) -> int:
+    """حل بازگشتی با حافظه روی رتبه متعارف؛ بایت نتیجه را برمی‌گرداند"""
+    rank = canonical_rank(board)
+    value = table.get(rank, UNKNOWN)
+    if value:
+        return value
+    opponent = 'O' if mover == 'X' else 'X'
+    if last is not None and board.wins_at(last, opponent):
+        value = LOSS
+    elif board.is_full():
+        value = DRAW
+    else:
+        wins, draws, losses = [], [], []
+        for index in board.empty_indices():
+            board.play(index, mover)
+            child = _solve(board, opponent, index, table)
+            board.unplay(index, mover)
+            result, distance = child & 3, child >> 2
+            if result == LOSS:
+                wins.append(distance)
+            elif result == DRAW:
+                draws.append(distance)
+            else:
+                losses.append(distance)
+        if wins:
+            value = WIN | min(min(wins) + 1, MAX_DISTANCE) << 2
+        elif draws:
+            value = DRAW | min(min(draws) + 1, MAX_DISTANCE) << 2
+        else:
+            value = LOSS | min(max(losses) + 1, MAX_DISTANCE) << 2
+    table[rank] = value
+    return value
+
+
+def _positions(size: int, pieces: int):
+    """همه وضعیت‌های قانونی با pieces مهره (بدون وضعیت‌های متقارن تکراری)"""
+    cells = range(size * size)
+    x_count = (pieces + 1) // 2
+    seen = set()
+    for xs in combinations(cells, x_count):
+        rest = [cell for cell in cells if cell not in xs]
+        for os_ in combinations(rest, pieces - x_count):
+            board = BitBoard(size, sum(1 << c for c in xs), sum(1 << c for c in os_))
+            # وضعیتی که بعد از برد ادامه یافته قانونی نیست: فقط آخرین حرکت‌کننده می‌تواند برنده باشد؛
+            # حل آن در حافظه به نام وضعیت‌های قانونی پایانی هم‌رتبه ثبت می‌شد
+            if board.has_won(side_to_move(board)):
+                continue
+            rank = canonical_rank(board)
+            if rank in seen:
+                continue
+            seen.add(rank)
+            yield board
+
+
+def generate(size: int, path: Optional[str] = None, min_pieces: int = 0) -> str:
+    """ساخت جدول پایانی برای همه وضعیت‌های با حداقل min_pieces مهره و نوشتن فایل دودویی"""
+    path = path or default_path(size)
+    table: Dict[int, int] = {}
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), size * size * 4 + 100))
+    if min_pieces == 0:
+        _solve(BitBoard(size), 'X', None, table)
+    else:
+        for board in _positions(size, min_pieces):
+            mover = side_to_move(board)
+            opponent = 'O' if mover == 'X' else 'X'
+            last = None
+            if board.has_won(opponent):
+                # هر خانه‌ای از خط برنده به عنوان آخرین حرکت کافی است
+                last = next(index for index in range(size * size)
+                            if board.mask(opponent) >> index & 1 and board.wins_at(index, opponent))
+            _solve(board, mover, last, table)
+    _write(path, size, min_pieces, table)
+    return path
+
+
+def _write(path: str, size: int, min_pieces: int, table: Dict[int, int]):
+    """نوشتن بلوک‌ها؛ وضعیت‌های پایانی (فاصله صفر) کنار گذاشته می‌شوند"""
+    cells = size * size
+    blocks: List[List[Tuple[int, int]]] = [[] for _ in range(cells + 1)]
+    for rank, value in table.items():
+        if value >> 2:
+            pieces, index = block_rank(size, rank)
+            blocks[pieces].append((index, value))
+    offset = HEADER.size + (cells + 1) * BLOCK.size
+    directory = []
+    for pieces, entries in enumerate(blocks):
+        entries.sort()
+        width = max(1, (_block_size(cells, (pieces + 1) // 2, pieces // 2) - 1).bit_length() + 7 >> 3)
+        directory.append((offset, len(entries), width))
+        offset += len(entries) * (width + 1)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, min_pieces))
+        for entry in directory:
+            f.write(BLOCK.pack(*entry))
+        for (_, _, width), entries in zip(directory, blocks):
+            f.write(b''.join(index.to_bytes(width, 'little') for index, _ in entries))
+            f.write(bytes(value for _, value in entries))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ساخت جدول پایانی تیک‌تاک‌تو")
+    parser.add_argument('size', type=int, help="ابعاد صفحه")
+    parser.add_argument('--min-pieces', type=int, default=0,
+                        help="فقط وضعیت‌های با حداقل این تعداد مهره (برای 4x4 میانه بازی به بعد)")
+    parser.add_argument('-o', '--output', help="مسیر فایل خروجی")
+    args = parser.parse_args(argv)
+    print(generate(args.size, args.output, args.min_pieces))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from typing import Dict, List, NamedTuple
+
+from bitboard import line_masks
+from csp_model import Cell, CSPModel
+
+
+class Threats(NamedTuple):
+    """تهدیدهای یک موقعیت از دید بازیکن نوبت"""
+    wins: List[Cell]           # حرکات برنده فوری
+    blocks: List[Cell]         # خانه‌هایی که حریف با آن‌ها فوراً می‌برد
+    forks: List[Cell]          # حرکاتی که دو تهدید برد هم‌زمان می‌سازند
+    opponent_forks: List[Cell]  # خانه‌هایی که حریف با آن‌ها تهدید دوگانه می‌سازد
+
+
+class ThreatDetector:
+    """تشخیص برد فوری، سد اجباری و تهدید دوگانه در O(خطوط) از شمارنده‌های افزایشی هر خط مدل CSP"""
+
+    def __init__(self, model: CSPModel):
+        self.model = model
+        # ماسک هر خط به ترتیب نام‌های مدل (همان ترتیب line_names)
+        self.masks: Dict[str, int] = dict(zip(model.constraints, line_masks(model.size)))
+
+    def _cells(self, mask: int) -> List[Cell]:
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(divmod(low.bit_length() - 1, self.model.size))
+            mask ^= low
+        return cells
+
+    def winning_cells(self, player: str) -> List[Cell]:
+        """خانه‌های خالی که player با آن‌ها خطی را کامل می‌کند (بدون تکرار، به ترتیب ردیفی)"""
+        size = self.model.size
+        empty = self.model.board.empty
+        found = 0
+        for name, counts in self.model.counts.items():
+            if counts[player] == size - 1 and counts[''] == 1:
+                found |= empty & self.masks[name]
+        return self._cells(found)
+
+    def fork_cells(self, player: str) -> List[Cell]:
+        """خانه‌هایی که دو یا چند خط یک‌حرکت‌مانده به برد برای player می‌سازند"""
+        size = self.model.size
+        if size < 3:
+            return []
+        empty = self.model.board.empty
+        seen = 0
+        forks = 0
+        for name, counts in self.model.counts.items():
+            if counts[player] == size - 2 and counts[''] == 2:
+                cells = empty & self.masks[name]
+                forks |= seen & cells
+                seen |= cells
+        return self._cells(forks)
+
+    def threats(self, player: str) -> Threats:
+        opponent = 'O' if player == 'X' else 'X'
+        return Threats(self.winning_cells(player), self.winning_cells(opponent),
+                       self.fork_cells(player), self.fork_cells(opponent))
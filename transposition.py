@@ -0,0 +1,152 @@
+import random
+from functools import lru_cache
+from typing import Optional, Tuple
+
+EXACT, LOWER, UPPER = 1, 2, 3  # نوع کران ذخیره‌شده در جدول
+ENTRY_BYTES = 16               # هر ورودی: یک کلید و یک داده ۶۴ بیتی
+DEFAULT_BUDGET_MB = 16
+
+_SCORE_OFFSET = 1 << 31
+_MASK64 = (1 << 64) - 1
+
+
+@lru_cache(maxsize=None)
+def symmetries(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """هشت تبدیل دوران و بازتاب صفحه مربعی به صورت جایگشت اندیس‌های خطی"""
+    maps = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, size - 1 - r),
+        lambda r, c: (size - 1 - r, size - 1 - c),
+        lambda r, c: (size - 1 - c, r),
+        lambda r, c: (r, size - 1 - c),
+        lambda r, c: (size - 1 - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (size - 1 - c, size - 1 - r),
+    )
+    perms = []
+    for f in maps:
+        perm = []
+        for index in range(size * size):
+            r, c = f(*divmod(index, size))
+            perm.append(r * size + c)
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+@lru_cache(maxsize=None)
+def inverse_symmetries(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """وارون هر جایگشت symmetries"""
+    inverses = []
+    for perm in symmetries(size):
+        inverse = [0] * len(perm)
+        for index, image in enumerate(perm):
+            inverse[image] = index
+        inverses.append(tuple(inverse))
+    return tuple(inverses)
+
+
+class ZobristHasher:
+    """کلیدهای زابریست برای هر هشت تقارن؛ کلید متعارف کمینه هشت هش است"""
+
+    def __init__(self, size: int, seed: int = 0x5EED):
+        rng = random.Random(seed * 1000003 + size)
+        base = {symbol: [rng.getrandbits(64) for _ in range(size * size)] for symbol in ('X', 'O')}
+        self.size = size
+        self.side_key = rng.getrandbits(64)
+        perms = symmetries(size)
+        # keys[symbol][index] = کلید خانه index در هر یک از هشت تبدیل
+        self.keys = {symbol: tuple(tuple(base[symbol][perm[index]] for perm in perms)
+                                   for index in range(size * size))
+                     for symbol in ('X', 'O')}
+        self.perms = perms
+        self.inverses = inverse_symmetries(size)
+
+    def hashes(self, board) -> list:
+        """هش‌های هشت‌گانه یک BitBoard"""
+        hashes = [0] * 8
+        for symbol, bits in (('X', board.x), ('O', board.o)):
+            keys = self.keys[symbol]
+            while bits:
+                low = bits & -bits
+                cell_keys = keys[low.bit_length() - 1]
+                for s in range(8):
+                    hashes[s] ^= cell_keys[s]
+                bits ^= low
+        return hashes
+
+    def toggle(self, hashes: list, index: int, symbol: str):
+        """افزودن یا حذف مهره symbol در خانه index (XOR خودوارون است)"""
+        cell_keys = self.keys[symbol][index]
+        for s in range(8):
+            hashes[s] ^= cell_keys[s]
+
+    def canonical(self, hashes: list, player: str) -> Tuple[int, int]:
+        """کلید متعارف وضعیت و شماره تقارنی که به آن می‌رسد"""
+        key = min(hashes)
+        sym = hashes.index(key)
+        if player == 'O':
+            key ^= self.side_key
+        return key, sym
+
+
+class TranspositionTable:
+    """جدول جابجایی با بودجه حافظه ثابت و جایگزینی دو ردیفه (اولویت عمق + همیشه جایگزین)"""
+
+    def __init__(self, budget_mb: float = DEFAULT_BUDGET_MB, buffer=None):
+        if buffer is None:
+            buffer = bytearray(max(2, int(budget_mb * 1024 * 1024) // ENTRY_BYTES) * ENTRY_BYTES)
+        self.buffer = buffer
+        # بافر می‌تواند حافظه مشترک بین فرایندها باشد (RawArray)؛ ابتدا به بایت تبدیل می‌شود
+        words = memoryview(buffer).cast('B').cast('Q')
+        self._words = words
+        self._keys = words[0::2]
+        self._data = words[1::2]
+        self.buckets = len(self._keys) // 2
+        self.generation = 0
+        self.hits = 0
+        self.probes = 0
+
+    def clear(self):
+        view = memoryview(self.buffer).cast('B')
+        view[:] = bytes(len(view))
+        self.generation = 0
+
+    def close(self):
+        """آزاد کردن نماهای بافر تا حافظه مشترک قابل بستن باشد"""
+        self._keys.release()
+        self._data.release()
+        self._words.release()
+
+    def new_search(self):
+        """شروع جستجوی تازه؛ ورودی‌های نسل‌های قبل در اولویت جایگزینی قرار می‌گیرند"""
+        self.generation = (self.generation + 1) & 63
+
+    @staticmethod
+    def _pack(depth: int, flag: int, score: int, move: int, generation: int) -> int:
+        return ((score + _SCORE_OFFSET) | (depth & 0xFF) << 32 | flag << 40 |
+                ((move + 1) & 0xFFFF) << 42 | generation << 58)
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """(عمق، نوع کران، امتیاز، حرکت متعارف یا -1) یا None"""
+        self.probes += 1
+        slot = (key % self.buckets) * 2
+        for i in (slot, slot + 1):
+            data = self._data[i]
+            if data and self._keys[i] ^ data == key:
+                self.hits += 1
+                return ((data >> 32) & 0xFF, (data >> 40) & 3,
+                        (data & 0xFFFFFFFF) - _SCORE_OFFSET, ((data >> 42) & 0xFFFF) - 1)
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score: int, move: int):
+        data = self._pack(depth, flag, score, move, self.generation)
+        slot = (key % self.buckets) * 2
+        old = self._data[slot]
+        # ردیف اول: عمیق‌تر، هم‌کلید یا کهنه را جایگزین کن؛ در غیر این صورت ردیف دوم
+        if (not old or self._keys[slot] ^ old == key or depth >= (old >> 32) & 0xFF
+                or (old >> 58) != self.generation):
+            self._keys[slot] = (key ^ data) & _MASK64
+            self._data[slot] = data
+        else:
+            self._keys[slot + 1] = (key ^ data) & _MASK64
+            self._data[slot + 1] = data